@@ -10,7 +10,11 @@ setup(
     author_email="juan.s.galindo@outlook.com",
     install_requires=[
         "aws-lambda-powertools==1.26.0",
-        "boto3==1.24.2",
+        "boto3==1.26.76",
         "requests==2.27.1",
     ],
+    extras_require={
+        "aio": ["aioboto3==11.1.0"],
+        "json": ["orjson==3.8.3"],
+    },
 )
@@ -1,29 +1,200 @@
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, ParamValidationError
 
 from boto3 import resource
 
-from general_utils.aws_wrappers.utils import Aws
+from general_utils.aws_wrappers.utils import Aws, AwsAsync
 from aws_lambda_powertools import Logger
 
-from typing import Iterable, Any
+import asyncio
+import atexit
+from queue import Queue, Empty, Full
+from threading import Lock, Thread
+from typing import Iterable, Any, Union, List
+from collections import deque
+from functools import lru_cache
+from time import time
+from weakref import WeakSet
 
 from datetime import datetime
 
+MAX_METRIC_DATUMS = 1000  # PutMetricData limit of MetricDatum items per request
+MAX_METRIC_DATA_QUERIES = 500  # GetMetricData limit of MetricDataQueries per request
+METRIC_QUEUE_SIZE = 10_000
+# Values kept buffered while PutMetricData fails, the oldest are dropped past this size.
+MAX_PENDING_DATUMS = 10 * MAX_METRIC_DATUMS
+# Returned with status 400, but the same data can be sent again later.
+THROTTLING_ERROR_CODES = ("Throttling", "ThrottlingException", "RequestLimitExceeded")
+
+# Instances with buffered data values, flushed when the interpreter exits.
+_UNFLUSHED_RESOURCES = WeakSet()
+
+# Shared by every instance, so put_metric_data_async never starts more than one thread.
+_METRIC_QUEUE = Queue(maxsize=METRIC_QUEUE_SIZE)
+_METRIC_WORKER = None
+_METRIC_WORKER_LOCK = Lock()
+
+
+def _start_metric_worker() -> None:
+    global _METRIC_WORKER
+
+    if _METRIC_WORKER is not None:
+        return
+
+    with _METRIC_WORKER_LOCK:
+        if _METRIC_WORKER is None:
+            worker = Thread(target=_drain_metric_queue, daemon=True)
+            worker.start()
+            _METRIC_WORKER = worker
+
+
+def _drain_metric_queue() -> None:
+    """Sends the queued (instance, namespace, datum) items as they arrive."""
+    while True:
+        queued_items = [_METRIC_QUEUE.get()]
+
+        try:
+            while len(queued_items) < MAX_METRIC_DATUMS:
+                queued_items.append(_METRIC_QUEUE.get_nowait())
+        except Empty:
+            pass
+
+        # The batch is sent from its own frame so the instances it references
+        # are released while the worker waits for the next items.
+        _send_queued_items(queued_items)
+        queued_items_count = len(queued_items)
+        del queued_items
+
+        for _ in range(queued_items_count):
+            _METRIC_QUEUE.task_done()
+
+
+def _send_queued_items(queued_items: list) -> None:
+    """Sends a batch of queued (instance, namespace, datum) items, grouped by instance."""
+    datums_by_resource = {}
+
+    for cloudwatch_resource, namespace, datum in queued_items:
+        datums_by_resource.setdefault(cloudwatch_resource, []).append(
+            (namespace, datum)
+        )
+
+    for cloudwatch_resource, namespaced_datums in datums_by_resource.items():
+        try:
+            cloudwatch_resource._send_datums(namespaced_datums)
+        except Exception:
+            cloudwatch_resource.logger.exception(
+                "Dropped %s queued data values.", len(namespaced_datums)
+            )
+
+
+@atexit.register
+def _flush_unflushed_resources() -> None:
+    for cloudwatch_resource in list(_UNFLUSHED_RESOURCES):
+        try:
+            cloudwatch_resource.flush()
+        except Exception:
+            pass  # Already logged by flush, the process is exiting anyway
+
+    if _METRIC_WORKER is not None:
+        _METRIC_QUEUE.join()
+
+
+def _is_rejected(error: Exception) -> bool:
+    """True if PutMetricData will never accept the data, so it must not be sent again."""
+    if isinstance(error, ParamValidationError):
+        return True
+
+    return (
+        isinstance(error, ClientError)
+        and error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 400
+        and error.response["Error"]["Code"] not in THROTTLING_ERROR_CODES
+    )
+
+
+def _build_metric_data_queries(queries: List[dict]) -> List[dict]:
+    return [
+        {
+            "Id": f"m{index}",
+            "MetricStat": {
+                "Metric": {
+                    "Namespace": query["namespace"],
+                    "MetricName": query["name"],
+                    "Dimensions": query.get("dimensions", []),
+                },
+                "Period": query["period"],
+                "Stat": query["stat"],
+            },
+        }
+        for index, query in enumerate(queries)
+    ]
+
+
+def _merge_metric_data_results(
+    metric_data_queries: List[dict], responses: Iterable[dict]
+) -> List[dict]:
+    """Joins the paginated MetricDataResults and sorts them in the order of the queries.
+    The StatusCode of each result is the one of its last page, the Messages of every
+    page are kept.
+    """
+    results = {}
+
+    for response in responses:
+        for result in response["MetricDataResults"]:
+            if result["Id"] in results:
+                merged_result = results[result["Id"]]
+                merged_result["Timestamps"].extend(result["Timestamps"])
+                merged_result["Values"].extend(result["Values"])
+                merged_result["StatusCode"] = result["StatusCode"]
+
+                if result.get("Messages"):
+                    merged_result.setdefault("Messages", []).extend(result["Messages"])
+            else:
+                results[result["Id"]] = result
+
+    return [
+        results[query["Id"]] for query in metric_data_queries if query["Id"] in results
+    ]
+
 
 class CloudWatchResource(Aws):
-    def __init__(self, aws_lambda_powertools_logger: Logger, **kwargs):
+    def __init__(
+        self,
+        aws_lambda_powertools_logger: Logger,
+        list_metrics_ttl: int = 300,
+        **kwargs,
+    ):
         """
         Args:
             aws_lambda_powertools_logger (Logger)
+            list_metrics_ttl (int, optional): Seconds the list_metrics results are cached, 0 disables
+                       the cache. Defaults to 300.
         """
+        if list_metrics_ttl < 0:
+            raise ValueError("list_metrics_ttl argument cannot be less than 0")
+
         super().__init__(resource, "cloudwatch", **kwargs)
 
         self.class_private_vars()["_logger"] = aws_lambda_powertools_logger
+        self.class_private_vars()["_list_metrics_ttl"] = list_metrics_ttl
+        self.class_private_vars()["_list_metrics_cache"] = lru_cache(maxsize=128)(
+            self._fetch_metrics
+        )
+        self.class_private_vars()["_pending_datums"] = deque()
+        self.class_private_vars()["_dropped_metrics"] = 0
+        self.class_private_vars()["_dropped_metrics_lock"] = Lock()
+
+    def _fetch_metrics(
+        self, namespace: str, name: str, recent: bool, time_bucket: int
+    ) -> tuple:
+        kwargs = {"Namespace": namespace, "MetricName": name}
+        if recent:
+            kwargs["RecentlyActive"] = "PT3H"  # List past 3 hours only
+        return tuple(self.resource.metrics.filter(**kwargs))
 
     def list_metrics(self, namespace: str, name: str, recent: bool = False) -> Iterable:
         """Gets the metrics within a namespace that have the specified name.
         If the metric has no dimensions, a single metric is returned.
         Otherwise, metrics for all dimensions are returned.
+        Results are cached for list_metrics_ttl seconds, unless it is 0.
 
         Args:
             namespace (str): The namespace of the metric.
@@ -32,23 +203,33 @@ class CloudWatchResource(Aws):
                        three hours are returned. Defaults to False.
 
         Returns:
-            Iterable:  An iterator that yields the retrieved metrics.
+            Iterable:  The retrieved metrics.
         """
         try:
-            kwargs = {"Namespace": namespace, "MetricName": name}
-            if recent:
-                kwargs["RecentlyActive"] = "PT3H"  # List past 3 hours only
-            metric_iter = self.resource.metrics.filter(**kwargs)
+            if self.list_metrics_ttl <= 0:
+                metrics = self._fetch_metrics(namespace, name, recent, 0)
+            else:
+                metrics = self.list_metrics_cache(
+                    namespace, name, recent, int(time() // self.list_metrics_ttl)
+                )
             self.logger.debug("Got metrics for %s.%s.", namespace, name)
         except ClientError:
             self.logger.exception("Couldn't get metrics for %s.%s.", namespace, name)
             raise
         else:
-            return metric_iter
+            return metrics
+
+    def invalidate_list_metrics_cache(self) -> None:
+        """Clears the cached list_metrics results."""
+        self.list_metrics_cache.cache_clear()
 
     def put_metric_data(self, namespace: str, name: str, value: Any, unit: str) -> None:
-        """Sends a single data value to CloudWatch for a metric. This metric is given
+        """Buffers a single data value for a metric. This metric is given
         a timestamp of the current UTC time.
+        The buffer is sent to CloudWatch once it reaches MAX_METRIC_DATUMS items, when
+        flush() is called, when the instance is used as a context manager and the block
+        exits, and when the interpreter exits. Errors of the sends started here are
+        logged, not raised.
 
         Args:
             namespace (str): The namespace of the metric.
@@ -56,16 +237,177 @@ class CloudWatchResource(Aws):
             value (Any): The value of the metric.
             unit (str): The unit of the metric.
         """
+        self.pending_datums.append(
+            (
+                namespace,
+                {
+                    "MetricName": name,
+                    "Value": value,
+                    "Unit": unit,
+                    "Timestamp": datetime.utcnow(),
+                },
+            )
+        )
+
+        _UNFLUSHED_RESOURCES.add(self)
+
+        # After a failed flush, the values stay buffered and the next attempt waits for
+        # another full batch.
+        if len(self.pending_datums) % MAX_METRIC_DATUMS == 0:
+            try:
+                self.flush()
+            except Exception:
+                pass  # Already logged by flush, the values are still buffered
+
+    def put_metric_data_batch(self, entries: Iterable[dict]) -> None:
+        """Buffers multiple data values. Each entry must contain the keys
+        namespace, name, value and unit.
+
+        Args:
+            entries (Iterable[dict]): The data values to send.
+        """
+        for entry in entries:
+            self.put_metric_data(
+                namespace=entry["namespace"],
+                name=entry["name"],
+                value=entry["value"],
+                unit=entry["unit"],
+            )
+
+    def _send_datums(
+        self, namespaced_datums: Iterable[tuple], requeue: bool = False
+    ) -> None:
+        """PutMetricData accepts a single namespace per request, so the values are
+        grouped by namespace and sent in chunks of MAX_METRIC_DATUMS.
+        Chunks rejected by validation are logged and dropped. If any other error occurs
+        it is raised, and if requeue is True, the values not sent are put back at the
+        front of pending_datums first.
+        """
+        grouped_datums = {}
+
+        for namespace, datum in namespaced_datums:
+            grouped_datums.setdefault(namespace, []).append(datum)
+
+        batches = [
+            (namespace, datums[index : index + MAX_METRIC_DATUMS])
+            for namespace, datums in grouped_datums.items()
+            for index in range(0, len(datums), MAX_METRIC_DATUMS)
+        ]
+
+        for batch_index, (namespace, batch) in enumerate(batches):
+            try:
+                self.resource.meta.client.put_metric_data(
+                    Namespace=namespace, MetricData=batch
+                )
+                self.logger.debug(
+                    "Put %s data values for namespace %s.", len(batch), namespace
+                )
+            except Exception as error:
+                if _is_rejected(error):
+                    self.logger.exception(
+                        "Dropped %s rejected data values for namespace %s.",
+                        len(batch),
+                        namespace,
+                    )
+                    self._count_dropped(len(batch))
+                    continue
+
+                self.logger.exception("Couldn't put data for namespace %s.", namespace)
+
+                if requeue:
+                    self._requeue_datums(
+                        (unsent_namespace, datum)
+                        for unsent_namespace, unsent_batch in batches[batch_index:]
+                        for datum in unsent_batch
+                    )
+                raise
+
+    def _count_dropped(self, count: int) -> None:
+        # Values are dropped from the caller threads and the metric worker.
+        with self.dropped_metrics_lock:
+            self.class_private_vars()["_dropped_metrics"] += count
+
+    def _requeue_datums(self, namespaced_datums: Iterable[tuple]) -> None:
+        """Puts the values back at the front of pending_datums, dropping the oldest
+        values past MAX_PENDING_DATUMS.
+        """
+        self.pending_datums.extendleft(reversed(list(namespaced_datums)))
+
+        overflow = len(self.pending_datums) - MAX_PENDING_DATUMS
+
+        if overflow > 0:
+            for _ in range(overflow):
+                self.pending_datums.popleft()
+
+            self._count_dropped(overflow)
+            self.logger.warning(
+                "Dropped the %s oldest buffered data values, the buffer is full.",
+                overflow,
+            )
+
+    def flush(self) -> None:
+        """Sends all the buffered data values to CloudWatch. Values rejected by validation
+        are dropped. If a request fails for any other reason, the values not sent stay
+        buffered, up to MAX_PENDING_DATUMS, and the error is raised.
+        """
+        namespaced_datums = []
+
+        while self.pending_datums:
+            namespaced_datums.append(self.pending_datums.popleft())
+
+        self._send_datums(namespaced_datums, requeue=True)
+
+        if not self.pending_datums:
+            _UNFLUSHED_RESOURCES.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def put_metric_data_async(
+        self, namespace: str, name: str, value: Any, unit: str
+    ) -> bool:
+        """Queues a single data value without blocking. A background thread, shared by all
+        the instances, sends the queued values in batches. If the queue is full the value
+        is dropped and counted in dropped_metrics.
+
+        Args:
+            namespace (str): The namespace of the metric.
+            name (str): The name of the metric.
+            value (Any): The value of the metric.
+            unit (str): The unit of the metric.
+
+        Returns:
+            bool: False if the value was dropped.
+        """
+        _start_metric_worker()
+
         try:
-            metric = self.resource.Metric(namespace, name)
-            metric.put_data(
-                Namespace=namespace,
-                MetricData=[{"MetricName": name, "Value": value, "Unit": unit}],
+            _METRIC_QUEUE.put_nowait(
+                (
+                    self,
+                    namespace,
+                    {
+                        "MetricName": name,
+                        "Value": value,
+                        "Unit": unit,
+                        "Timestamp": datetime.utcnow(),
+                    },
+                )
             )
-            self.logger.debug("Put data for metric %s.%s", namespace, name)
-        except ClientError:
-            self.logger.exception("Couldn't put data for metric %s.%s", namespace, name)
-            raise
+        except Full:
+            self._count_dropped(1)
+            return False
+
+        return True
+
+    def wait_for_async_metrics(self) -> None:
+        """Blocks until every value queued by put_metric_data_async has been sent.
+        The queue is shared, so values queued by other instances are waited for too.
+        """
+        _METRIC_QUEUE.join()
 
     def put_metric_data_set(
         self, namespace: str, name: str, timestamp: datetime, unit: str, data_set: dict
@@ -103,6 +445,118 @@ class CloudWatchResource(Aws):
             )
             raise
 
+    def get_metric_data(
+        self, queries: List[dict], start: datetime, end: datetime
+    ) -> List[dict]:
+        """Gets the data points of multiple metrics within a specified time span.
+        The queries are sent in chunks of MAX_METRIC_DATA_QUERIES per request.
+
+        Args:
+            queries (List[dict]): Each query must contain the keys namespace, name, period
+                       and stat. The key dimensions is optional.
+            start (datetime): The UTC start time of the time span to retrieve.
+            end (datetime): The UTC end time of the time span to retrieve.
+
+        Returns:
+            List[dict]: One MetricDataResult per query, in the same order as the queries.
+        """
+        metric_data_queries = _build_metric_data_queries(queries)
+        responses = []
+
+        for index in range(0, len(metric_data_queries), MAX_METRIC_DATA_QUERIES):
+            request_args = {
+                "MetricDataQueries": metric_data_queries[
+                    index : index + MAX_METRIC_DATA_QUERIES
+                ],
+                "StartTime": start,
+                "EndTime": end,
+            }
+            try:
+                while True:
+                    response = self.resource.meta.client.get_metric_data(**request_args)
+                    responses.append(response)
+
+                    if "NextToken" not in response:
+                        break
+
+                    request_args["NextToken"] = response["NextToken"]
+            except ClientError:
+                self.logger.exception("Couldn't get metric data.")
+                raise
+
+        self.logger.debug("Got metric data for %s queries.", len(queries))
+
+        return _merge_metric_data_results(metric_data_queries, responses)
+
+    def get_active_metric_data(
+        self,
+        namespace: str,
+        name: str,
+        start: datetime,
+        end: datetime,
+        period: int,
+        stat_types: List[str],
+        dimensions: List[List[dict]] = None,
+    ) -> List[dict]:
+        """Gets the data points of the metrics that have been active in the last three hours.
+        Inactive metrics are skipped, so no GetMetricData queries are spent on them.
+
+        Args:
+            namespace (str): The namespace of the metric.
+            name (str): The name of the metric.
+            start (datetime): The UTC start time of the time span to retrieve.
+            end (datetime): The UTC end time of the time span to retrieve.
+            period (int): The period, in seconds, in which to group metrics.
+            stat_types (List[str]): Only these statistics are requested, such as Average or Maximum.
+            dimensions (List[List[dict]], optional): Dimension sets to retrieve. Defaults to None,
+                       all the active dimension sets are retrieved.
+
+        Returns:
+            List[dict]: One MetricDataResult per active metric and statistic, with the extra keys
+                       Dimensions and Stat.
+        """
+        active_metrics = self.list_metrics(namespace, name, recent=True)
+
+        if dimensions is not None:
+            requested_dimensions = {
+                frozenset((d["Name"], d["Value"]) for d in dimension_set)
+                for dimension_set in dimensions
+            }
+            active_metrics = [
+                metric
+                for metric in active_metrics
+                if frozenset((d["Name"], d["Value"]) for d in metric.dimensions)
+                in requested_dimensions
+            ]
+
+        queries = [
+            {
+                "namespace": namespace,
+                "name": name,
+                "dimensions": metric.dimensions,
+                "period": period,
+                "stat": stat,
+            }
+            for metric in active_metrics
+            for stat in stat_types
+        ]
+
+        if not queries:
+            return []
+
+        results = self.get_metric_data(queries=queries, start=start, end=end)
+        results_by_id = {result["Id"]: result for result in results}
+
+        return [
+            {
+                **results_by_id[f"m{index}"],
+                "Dimensions": query["dimensions"],
+                "Stat": query["stat"],
+            }
+            for index, query in enumerate(queries)
+            if f"m{index}" in results_by_id
+        ]
+
     def get_metric_statistics(
         self,
         namespace: str,
@@ -110,8 +564,8 @@ class CloudWatchResource(Aws):
         start: datetime,
         end: datetime,
         period,
-        stat_types: str,
-    ) -> int:
+        stat_types: Union[str, List[str]],
+    ) -> dict:
         """Gets statistics for a metric within a specified time span. Metrics are grouped
         into the specified period.
 
@@ -125,12 +579,16 @@ class CloudWatchResource(Aws):
                        the metric's age. For example, metrics that are older than
                        three hours have a one-minute granularity, so the period must
                        be at least 60 and must be a multiple of 60.
-            stat_types (str): The type of statistics to retrieve, such as average value
+            stat_types (Union[str, List[str]]): The type of statistics to retrieve, such as average value
                            or maximum value.
 
         Returns:
-            int: The retrieved statistics for the metric.
+            dict: The GetMetricStatistics response, with the keys Label and Datapoints.
+                  Use get_metric_data to query several metrics in one request.
         """
+        if isinstance(stat_types, str):
+            stat_types = [stat_types]
+
         try:
             metric = self.resource.Metric(namespace, name)
             stats = metric.get_statistics(
@@ -266,3 +724,138 @@ class CloudWatchResource(Aws):
                 metric_name,
             )
             raise
+
+
+class CloudWatchResourceAsync(AwsAsync):
+    def __init__(self, aws_lambda_powertools_logger: Logger, **kwargs):
+        """Async version of CloudWatchResource. Use it as an async context manager:
+            async with CloudWatchResourceAsync(logger) as cloudwatch: ...
+
+        Args:
+            aws_lambda_powertools_logger (Logger)
+        """
+        super().__init__("cloudwatch", **kwargs)
+
+        self.class_private_vars()["_logger"] = aws_lambda_powertools_logger
+
+    async def put_metric_data(
+        self, namespace: str, name: str, value: Any, unit: str
+    ) -> None:
+        """Sends a single data value to CloudWatch for a metric. This metric is given
+        a timestamp of the current UTC time.
+
+        Args:
+            namespace (str): The namespace of the metric.
+            name (str): The name of the metric.
+            value (Any): The value of the metric.
+            unit (str): The unit of the metric.
+        """
+        try:
+            await self._call(
+                "put_metric_data",
+                Namespace=namespace,
+                MetricData=[
+                    {
+                        "MetricName": name,
+                        "Value": value,
+                        "Unit": unit,
+                        "Timestamp": datetime.utcnow(),
+                    }
+                ],
+            )
+            self.logger.debug("Put data for metric %s.%s", namespace, name)
+        except ClientError:
+            self.logger.exception("Couldn't put data for metric %s.%s", namespace, name)
+            raise
+
+    async def put_metric_data_set(
+        self, namespace: str, name: str, timestamp: datetime, unit: str, data_set: dict
+    ) -> None:
+        """Sends a set of data to CloudWatch for a metric. All of the data in the set
+        have the same timestamp and unit.
+
+        Args:
+            namespace (str): The namespace of the metric.
+            name (str): The name of the metric.
+            timestamp (datetime): The UTC timestamp for the metric.
+            unit (str): The unit of the metric.
+            data_set (dict): The set of data to send. This set is a dictionary that
+                         contains a list of values and a list of corresponding counts.
+                         The value and count lists must be the same length.
+        """
+        try:
+            await self._call(
+                "put_metric_data",
+                Namespace=namespace,
+                MetricData=[
+                    {
+                        "MetricName": name,
+                        "Timestamp": timestamp,
+                        "Values": data_set["values"],
+                        "Counts": data_set["counts"],
+                        "Unit": unit,
+                    }
+                ],
+            )
+            self.logger.debug("Put data set for metric %s.%s.", namespace, name)
+        except ClientError:
+            self.logger.exception(
+                "Couldn't put data set for metric %s.%s.", namespace, name
+            )
+            raise
+
+    async def get_metric_data(
+        self, queries: List[dict], start: datetime, end: datetime
+    ) -> List[dict]:
+        """Gets the data points of multiple metrics within a specified time span.
+        The chunks of MAX_METRIC_DATA_QUERIES queries are requested concurrently.
+
+        Args:
+            queries (List[dict]): Each query must contain the keys namespace, name, period
+                       and stat. The key dimensions is optional.
+            start (datetime): The UTC start time of the time span to retrieve.
+            end (datetime): The UTC end time of the time span to retrieve.
+
+        Returns:
+            List[dict]: One MetricDataResult per query, in the same order as the queries.
+        """
+        metric_data_queries = _build_metric_data_queries(queries)
+
+        async def _get_chunk(chunk):
+            request_args = {
+                "MetricDataQueries": chunk,
+                "StartTime": start,
+                "EndTime": end,
+            }
+            responses = []
+
+            while True:
+                response = await self._call("get_metric_data", **request_args)
+                responses.append(response)
+
+                if "NextToken" not in response:
+                    return responses
+
+                request_args["NextToken"] = response["NextToken"]
+
+        try:
+            chunk_responses = await asyncio.gather(
+                *(
+                    _get_chunk(
+                        metric_data_queries[index : index + MAX_METRIC_DATA_QUERIES]
+                    )
+                    for index in range(
+                        0, len(metric_data_queries), MAX_METRIC_DATA_QUERIES
+                    )
+                )
+            )
+        except ClientError:
+            self.logger.exception("Couldn't get metric data.")
+            raise
+
+        self.logger.debug("Got metric data for %s queries.", len(queries))
+
+        return _merge_metric_data_results(
+            metric_data_queries,
+            (response for responses in chunk_responses for response in responses),
+        )
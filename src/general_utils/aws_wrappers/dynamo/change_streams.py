@@ -1,10 +1,18 @@
-import timeit
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 
 from boto3 import client
 
 from general_utils.aws_wrappers.utils import Aws
 
+# Seconds between describe_stream calls, it can only be called 10 times per sec max.
+DESCRIBE_STREAM_INTERVAL = 1
+MAX_WORKERS = 16
+
+SEQUENCE_ITERATOR_TYPES = frozenset(("AT_SEQUENCE_NUMBER", "AFTER_SEQUENCE_NUMBER"))
+VALID_ITERATOR_TYPES = SEQUENCE_ITERATOR_TYPES | {"TRIM_HORIZON", "LATEST"}
+
 
 class AwsChangeStream(Aws):
     """
@@ -15,7 +23,7 @@ class AwsChangeStream(Aws):
 
     Records are deleted after 24 hours, If all the records are deleted then the shard is deleted.
 
-    Shards can close at any time. In order to get the current state of the shards, you can use client.describe_stream()/self.get_shard_object_array() method but it can only be called up to  10 times per second.
+    Shards can close at any time. In order to get the current state of the shards, you can use self.describe_stream()/self.get_shard_object_array() method but it can only be called up to  10 times per second.
     """
 
     def __init__(self, stream_arn: str, **kwargs) -> None:
@@ -29,23 +37,29 @@ class AwsChangeStream(Aws):
 
         self.class_private_vars()[f"_stream_arn"] = stream_arn
 
-    def get_shard_object_array(self):
+    def describe_stream(self) -> dict:
+        """Method to get the stream description. The response fields are stored as attributes.
+
+        Returns:
+            dict
+        """
         stream_response = self.client.describe_stream(StreamArn=self.stream_arn)
-        for key, value in stream_response.items():
-            self.class_private_vars()[f"_{key}"] = value
+        self.class_private_vars().update(
+            {f"_{k}": v for k, v in stream_response.items()}
+        )
+
+        return self.StreamDescription
 
-        return self.StreamDescription["Shards"]
+    def get_shard_object_array(self) -> list:
+        return self.client.describe_stream(StreamArn=self.stream_arn)[
+            "StreamDescription"
+        ]["Shards"]
 
     def create_shard_iterator(
         self, iterator_type: str, shard_id: str, SequenceNumber: int = None
     ):
 
-        if iterator_type not in [
-            "TRIM_HORIZON",
-            "AT_SEQUENCE_NUMBER",
-            "AFTER_SEQUENCE_NUMBER",
-            "LATEST",
-        ]:
+        if iterator_type not in VALID_ITERATOR_TYPES:
             raise TypeError("Iterator type is not valid")
 
         iterator_args = {
@@ -54,7 +68,7 @@ class AwsChangeStream(Aws):
             "ShardIteratorType": iterator_type,
         }
 
-        if iterator_type in ["AFTER_SEQUENCE_NUMBER", "AT_SEQUENCE_NUMBER"]:
+        if iterator_type in SEQUENCE_ITERATOR_TYPES:
 
             if SequenceNumber is None:
                 raise ValueError("This iterator type needs a SequenceNumber")
@@ -86,18 +100,18 @@ class StreamOrchestrator:
     sequence_number: int
     AwsChangeStream: AwsChangeStream
     shard_array: list = field(init=False)
+    child_shards_by_parent_id: dict = field(init=False)
+    shard_sequence_ranges: list = field(init=False)
     open_shards: list = field(init=False)
     closed_shards: list = field(init=False)
     sequence_shard_info: dict = field(init=False)
     is_sequence_shard_open: bool = field(init=False)
-    next_shard_iterator: iter = field(init=False)
 
     def __post_init__(self):
         self.sequence_number = str(self.sequence_number)
 
         self.shard_array = self.AwsChangeStream.get_shard_object_array()
-        self.open_shards = self.get_open_shards()
-        self.closed_shards = self.get_closed_shards()
+        self.index_shards()
         self.sequence_shard_info = self.find_shard_info(
             sequence_number=self.sequence_number
         )
@@ -110,46 +124,67 @@ class StreamOrchestrator:
         else:
             self.is_sequence_shard_open = False
 
-        self.next_shard_iterator = None
-
     @staticmethod
     def is_shard_open(shard_info: dict) -> bool:
         return "EndingSequenceNumber" not in shard_info["SequenceNumberRange"].keys()
 
-    def get_closed_shards(self) -> list:
-        return sorted(
-            list(
-                filter(
-                    lambda x: "EndingSequenceNumber" in x["SequenceNumberRange"].keys(),
-                    self.shard_array,
+    def index_shards(self) -> None:
+        """Single pass over shard_array to build the open/closed lists and the children lookup."""
+        self.child_shards_by_parent_id = {}
+        self.shard_sequence_ranges = []
+        self.open_shards = []
+        self.closed_shards = []
+
+        for shard in self.shard_array:
+            if "ParentShardId" in shard:
+                self.child_shards_by_parent_id.setdefault(shard["ParentShardId"], shard)
+
+            # Open shards have no EndingSequenceNumber, their range is unbounded.
+            self.shard_sequence_ranges.append(
+                (
+                    float(shard["SequenceNumberRange"]["StartingSequenceNumber"]),
+                    float(
+                        shard["SequenceNumberRange"].get("EndingSequenceNumber", "inf")
+                    ),
+                    shard,
                 )
-            ),
-            key=lambda x: x["SequenceNumberRange"]["StartingSequenceNumber"],
+            )
+
+            if StreamOrchestrator.is_shard_open(shard):
+                self.open_shards.append(shard)
+            else:
+                self.closed_shards.append(shard)
+
+        self.closed_shards.sort(
+            key=lambda x: x["SequenceNumberRange"]["StartingSequenceNumber"]
         )
 
+    def get_closed_shards(self) -> list:
+        return self.closed_shards
+
     def get_open_shards(self) -> list:
-        return list(filter(StreamOrchestrator.is_shard_open, self.shard_array))
+        return self.open_shards
 
     def find_shard_info(self, sequence_number: str) -> dict:
 
-        try:
-            filtered_array = list(
-                filter(
-                    lambda x: float(x["SequenceNumberRange"]["StartingSequenceNumber"])
-                    <= float(sequence_number)
-                    <= float(x["SequenceNumberRange"]["EndingSequenceNumber"]),
-                    self.shard_array,
-                )
-            )
-        except KeyError:
-            filtered_array = self.get_open_shards()
+        sequence_number = float(sequence_number)
 
-        if filtered_array:
-            return filtered_array[0]
+        return next(
+            (
+                shard
+                for start, end, shard in self.shard_sequence_ranges
+                if start <= sequence_number <= end
+            ),
+            None,
+        )
 
     @staticmethod
     def filter_shard_array(shard_id: str, shard_array: list) -> dict:
-        return list(filter(lambda x: x["ShardId"] == shard_id, shard_array))[0]
+        for shard in shard_array:
+            if shard["ShardId"] == shard_id:
+                return shard
+
+        raise IndexError(f"Shard {shard_id} not found")
 
     def get_data_from_iterator(self, shard_iterator) -> dict:
 
@@ -161,101 +196,80 @@ class StreamOrchestrator:
 
         filtered_shards = []
 
-        while True:
-
-            child_shard = list(
-                filter(
-                    lambda x: x["ParentShardId"] == starting_shard["ShardId"],
-                    self.shard_array,
-                )
-            )
-
-            if child_shard:
-
-                child_shard = child_shard[0]
-
-                if "EndingSequenceNumber" in child_shard["SequenceNumberRange"].keys():
-                    filtered_shards.append(child_shard)
-                    starting_shard = child_shard
+        child_shard = self.child_shards_by_parent_id.get(starting_shard["ShardId"])
 
-                else:
-                    break
-            else:
-                break
+        while child_shard is not None and not StreamOrchestrator.is_shard_open(
+            child_shard
+        ):
+            filtered_shards.append(child_shard)
+            child_shard = self.child_shards_by_parent_id.get(child_shard["ShardId"])
 
         return filtered_shards
 
-    def get_data_from_shard(self, *args, **kargs) -> dict:
+    def get_data_from_shard(self, shard_iterator: str = None, *args, **kargs) -> dict:
+        """Gets the records of a shard. The NextShardIterator of the returned data must be
+        passed as shard_iterator to continue reading the shard. If shard_iterator is None
+        a new iterator is created using args and kargs.
 
-        if self.next_shard_iterator is None:
+        Returns:
+            dict: None once the shard is closed and all its records were read.
+        """
+        if shard_iterator is None:
 
-            iterator = self.AwsChangeStream.create_shard_iterator(*args, **kargs)[
+            shard_iterator = self.AwsChangeStream.create_shard_iterator(*args, **kargs)[
                 "ShardIterator"
             ]
 
-        else:
-            iterator = self.next_shard_iterator
-
-        iterator_data = self.get_data_from_iterator(shard_iterator=iterator)
+        iterator_data = self.get_data_from_iterator(shard_iterator=shard_iterator)
 
         if "NextShardIterator" not in iterator_data.keys():  # and not open_shard:
 
             return None
 
-        self.next_shard_iterator = iterator_data["NextShardIterator"]
-
         return iterator_data
 
     def get_stream_data(
         self, open_shard: bool, limit_records: int = None, *args, **kargs
     ) -> None:
 
-        self.next_shard_iterator = None
+        shard_iterator = None
 
         if open_shard:
 
-            if args:
-
-                shard_id = [arg for arg in args if "shardId" in arg][0]
+            # args/kargs are forwarded to AwsChangeStream.create_shard_iterator
+            shard_id = kargs["shard_id"] if "shard_id" in kargs else args[1]
 
-            if kargs:
-
-                for key, value in kargs.items():
-                    if "shardId" in value:
-                        shard_id = kargs[key]
-
-            start = timeit.default_timer()
+            deadline = monotonic() + DESCRIBE_STREAM_INTERVAL
 
         counter = 0
 
         while True:
 
-            data = self.get_data_from_shard(*args, **kargs)
+            data = self.get_data_from_shard(shard_iterator, *args, **kargs)
 
             if not open_shard:
                 if data is None:
                     break
 
+            shard_iterator = data["NextShardIterator"]
+
             if data["Records"]:
                 print(
                     data["Records"]
                 )  # modify to add Kafka/RabbitMQ or list to append data.
 
-            if open_shard:
-
-                stop = timeit.default_timer()
+            elif open_shard and monotonic() >= deadline:
 
-                if (stop - start) > 1:  # Can only request array 10 times per sec max.
-
-                    shard_dict = StreamOrchestrator.filter_shard_array(
-                        shard_id=shard_id,
-                        shard_array=self.AwsChangeStream.get_shard_object_array(),
-                    )
+                # The shard state only matters once it has been drained.
+                shard_dict = StreamOrchestrator.filter_shard_array(
+                    shard_id=shard_id,
+                    shard_array=self.AwsChangeStream.get_shard_object_array(),
+                )
 
-                    if not StreamOrchestrator.is_shard_open(shard_dict):
-                        return {"shard_id": shard_id, "closed": True}
+                if not StreamOrchestrator.is_shard_open(shard_dict):
+                    return {"shard_id": shard_id, "closed": True}
 
-                    start = timeit.default_timer()
+                deadline = monotonic() + DESCRIBE_STREAM_INTERVAL
 
             if limit_records:
 
@@ -264,6 +278,31 @@ class StreamOrchestrator:
 
                 counter += 1
 
+    @staticmethod
+    def get_shard_lineages(shard_array: list) -> list:
+        """Splits the shards into lineages, one per root shard with all of its descendants
+        (a shard can split into several children). Records of the same item stay within one
+        lineage, so lineages can be processed concurrently.
+
+        Args:
+            shard_array (list): Shards sorted by StartingSequenceNumber.
+
+        Returns:
+            list: Lists of shards, each one keeping the order of shard_array, so parents come
+                before their children.
+        """
+        root_id_by_shard_id = {}
+        lineages_by_root_id = {}
+
+        for shard in shard_array:
+            root_id = root_id_by_shard_id.get(
+                shard.get("ParentShardId"), shard["ShardId"]
+            )
+            root_id_by_shard_id[shard["ShardId"]] = root_id
+            lineages_by_root_id.setdefault(root_id, []).append(shard)
+
+        return list(lineages_by_root_id.values())
+
     def trim_horizon_closed_shards(self, closed_shards: list = None) -> None:
 
         if closed_shards is None:
@@ -272,23 +311,19 @@ class StreamOrchestrator:
         else:
             closed_shards_array = closed_shards
 
-        closed_shards = list(
-            map(lambda x: x["ShardId"], closed_shards_array)
-        )  # Trims horizon all closed Shards
-
-        open_shard_bool = len(closed_shards) * [False]
-        limit_records_none = len(closed_shards) * [None]
-        iterator_type = len(closed_shards) * ["TRIM_HORIZON"]
-
-        list(
-            map(
-                self.get_stream_data,
-                open_shard_bool,
-                limit_records_none,
-                iterator_type,
-                closed_shards,
-            )
-        )
+        lineages = StreamOrchestrator.get_shard_lineages(closed_shards_array)
+
+        if not lineages:
+            return
+
+        def trim_horizon_lineage(lineage):
+            for shard in lineage:  # Trims horizon all closed Shards
+                self.get_stream_data(False, None, "TRIM_HORIZON", shard["ShardId"])
+
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, len(lineages))
+        ) as executor:
+            list(executor.map(trim_horizon_lineage, lineages))
 
     def start_sequence_closed_shards(self) -> None:
 
@@ -19,11 +19,14 @@ class AwsDynamoDb(Aws):
     def import_table_fields(self):
         table_response = self.client.describe_table(TableName=self.table_name)
 
-        for key, value in table_response.items():
-            self.class_private_vars()[f"_{key}"] = value
+        self.class_private_vars().update(
+            {f"_{k}": v for k, v in table_response.items()}
+        )
 
         try:
-            self.class_private_vars()[f"_stream_arn"] = self.Table["LatestStreamArn"]
+            self.class_private_vars()[f"_stream_arn"] = table_response["Table"][
+                "LatestStreamArn"
+            ]
         except KeyError:
             print(
                 "Stream needs to be enabled in the Exports and Streams section of the table."
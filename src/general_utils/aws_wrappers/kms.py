@@ -1,9 +1,14 @@
 from ast import arg
 import base64
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from boto3 import client
 
-from general_utils.aws_wrappers.utils import Aws
+from general_utils.aws_wrappers.utils import Aws, AwsAsync
+
+MAX_WORKERS = 32
+DECRYPT_RESPONSE_SKIP_KEYS = frozenset(("KeyId", "Plaintext"))
 
 
 class AwsKms(Aws):
@@ -23,12 +28,12 @@ class AwsKms(Aws):
     def _send_encrypt_request(self, secret: str) -> dict:
         return self.client.encrypt(
             KeyId=self.KeyId,
-            Plaintext=bytes(secret, encoding="utf8"),
+            Plaintext=secret.encode("utf-8"),
         )
 
     def _send_decrypt_request(self, secret: str) -> dict:
         return self.client.decrypt(
-            KeyId=self.KeyId, CiphertextBlob=bytes(base64.b64decode(secret))
+            KeyId=self.KeyId, CiphertextBlob=base64.b64decode(secret)
         )
 
     def encrypt(self, secret: str) -> str:
@@ -42,13 +47,11 @@ class AwsKms(Aws):
         """
 
         ciphertext = self._send_encrypt_request(secret=secret)
+        ciphertext_blob = ciphertext.pop("CiphertextBlob")
 
-        for key, value in ciphertext.items():
-
-            if key != "CiphertextBlob":
-                self.class_private_vars()[f"_{key}"] = value
+        self.class_private_vars().update({f"_{k}": v for k, v in ciphertext.items()})
 
-        return base64.b64encode(ciphertext["CiphertextBlob"]).decode("utf-8")
+        return base64.b64encode(ciphertext_blob).decode("utf-8")
 
     def bulk_encrypt(self, *args) -> list:
         """Method to encrypt multiple items using KMS.
@@ -62,7 +65,11 @@ class AwsKms(Aws):
                 self._send_encrypt_request(secret)["CiphertextBlob"]
             ).decode("utf-8")
 
-        return list(map(_bulk_request_func, args))
+        if not args:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(args))) as executor:
+            return list(executor.map(_bulk_request_func, args))
 
     def decrypt(self, secret: str) -> str:
         """Method to decrypt secrets using AWS KMS.
@@ -75,10 +82,13 @@ class AwsKms(Aws):
         """
         plaintext = self._send_decrypt_request(secret=secret)
 
-        for key, value in plaintext.items():
-
-            if key not in ["KeyId", "Plaintext"]:
-                self.class_private_vars()[f"_{key}"] = value
+        self.class_private_vars().update(
+            {
+                f"_{k}": v
+                for k, v in plaintext.items()
+                if k not in DECRYPT_RESPONSE_SKIP_KEYS
+            }
+        )
 
         return plaintext["Plaintext"].decode("UTF-8")
 
@@ -88,28 +98,44 @@ class AwsKms(Aws):
         Returns:
             list
         """
+        LOGGER = None
+
         for k in kwargs.keys():
 
             if k.lower() == "logger":
                 LOGGER = kwargs[k]
 
-            else:
-                LOGGER = None
+        def _decrypt_value(value):
+            return self._send_decrypt_request(secret=value)["Plaintext"].decode("UTF-8")
+
+        values = []
+
+        for secret in args:
+            if isinstance(secret, list) or isinstance(secret, set):
+                values.extend(secret)
+
+            elif isinstance(secret, str):
+                values.append(secret)
+
+        futures = []
+
+        if values:
+            # Nested values share the pool so every KMS request runs concurrently.
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_WORKERS, len(values))
+            ) as executor:
+                futures = [executor.submit(_decrypt_value, value) for value in values]
+
+        futures_iter = iter(futures)
 
         def _bulk_request_func(secret):
             try:
                 if isinstance(secret, list) or isinstance(secret, set):
-                    return [
-                        self._send_decrypt_request(secret=value)["Plaintext"].decode(
-                            "UTF-8"
-                        )
-                        for value in secret
-                    ]
+                    secret_futures = [next(futures_iter) for _ in secret]
+                    return [future.result() for future in secret_futures]
 
                 elif isinstance(secret, str):
-                    return self._send_decrypt_request(secret=secret)[
-                        "Plaintext"
-                    ].decode("UTF-8")
+                    return next(futures_iter).result()
 
                 else:
                     raise ValueError(
@@ -123,3 +149,93 @@ class AwsKms(Aws):
                 return secret
 
         return list(map(_bulk_request_func, args))
+
+
+class AwsKmsAsync(AwsAsync):
+    def __init__(self, KeyId: str, **kwargs) -> None:
+        """Async version of AwsKms. Use it as an async context manager:
+            async with AwsKmsAsync(KeyId) as kms: await kms.encrypt(secret)
+
+        Args:
+            KeyId (str): AWS KMS key id. Format: alias/key name -> Test example: alias/Sebastian/hl7
+            **kwargs: Arguments to pass to the kms client.
+        """
+        super().__init__("kms", **kwargs)
+
+        self.class_private_vars()["_KeyId"] = (
+            KeyId if "alias" == KeyId[0:5] else "alias/" + KeyId
+        )
+
+    async def encrypt(self, secret: str) -> str:
+        """Method to encrypt words using AWS KMS
+
+        Args:
+            secret (str)
+
+        Returns:
+            str
+        """
+        ciphertext = await self._call(
+            "encrypt", KeyId=self.KeyId, Plaintext=secret.encode("utf-8")
+        )
+
+        return base64.b64encode(ciphertext["CiphertextBlob"]).decode("utf-8")
+
+    async def bulk_encrypt(self, *args) -> list:
+        """Method to encrypt multiple items concurrently using KMS.
+
+        Returns:
+            list
+        """
+        return list(await asyncio.gather(*map(self.encrypt, args)))
+
+    async def decrypt(self, secret: str) -> str:
+        """Method to decrypt secrets using AWS KMS.
+
+        Args:
+            secret (str)
+
+        Returns:
+            str
+        """
+        plaintext = await self._call(
+            "decrypt",
+            KeyId=self.KeyId,
+            CiphertextBlob=base64.b64decode(secret),
+        )
+
+        return plaintext["Plaintext"].decode("UTF-8")
+
+    async def bulk_decrypt(self, *args, **kwargs) -> list:
+        """Method to decrypt mutiple items concurrently using KMS.
+
+        Returns:
+            list
+        """
+        LOGGER = None
+
+        for k in kwargs.keys():
+
+            if k.lower() == "logger":
+                LOGGER = kwargs[k]
+
+        async def _bulk_request_func(secret):
+            try:
+                if isinstance(secret, list) or isinstance(secret, set):
+                    return list(await asyncio.gather(*map(self.decrypt, secret)))
+
+                elif isinstance(secret, str):
+                    return await self.decrypt(secret)
+
+                else:
+                    raise ValueError(
+                        f"Bulk decrypt cannot handle instances: {type(secret)}"
+                    )
+            except Exception as e:
+                if LOGGER is not None:
+                    LOGGER.error(
+                        f"Lambda with Bulk Decrypt: {str(e)} - value: {secret}"
+                    )
+                return secret
+
+        return list(await asyncio.gather(*map(_bulk_request_func, args)))
@@ -1,17 +1,103 @@
-import codecs
-from json import load, dumps
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass, field
 from contextlib import contextmanager
 from csv import reader, writer
 from datetime import datetime
-from io import StringIO, TextIOWrapper
-from typing import Union, Callable
+from io import BytesIO, TextIOWrapper
+from itertools import islice
+from json import dumps as json_dumps, loads
+from typing import Union, Callable, Iterable, Iterator, List, Tuple
 
 from boto3 import resource
+from boto3.s3.transfer import TransferConfig
 
+from botocore.exceptions import ClientError
 from botocore.response import StreamingBody
 from general_utils.aws_wrappers.utils import Aws
 
+try:
+    from orjson import dumps as orjson_dumps, OPT_NON_STR_KEYS
+except ImportError:
+    orjson_dumps = None
+
+MAX_DELETE_OBJECTS = 1000  # DeleteObjects limit of keys per request
+MULTIPART_SIZE = (
+    8 * 1024 * 1024
+)  # Uploads above this size are sent in parts of this size
+# Up to this many keys, their versions are listed per key instead of scanning the bucket.
+MAX_KEYS_LISTED_BY_PREFIX = 50
+READ_CHUNK_SIZE = 1024 * 1024  # Size of the chunks read from object bodies
+# Errors of a missing object, only then S3FileAppendData starts a new file.
+NEW_FILE_ERROR_CODES = ("NoSuchKey", "404")
+# Default for S3Bucket.upload_file/download_file. max_concurrency applies per call.
+FILE_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_SIZE,
+    multipart_chunksize=MULTIPART_SIZE,
+    max_concurrency=10,
+    use_threads=True,
+    io_chunksize=READ_CHUNK_SIZE,
+)
+
+
+def _dumps(rows: list) -> Union[str, bytes]:
+    """Serializes the rows with orjson, or with json for what orjson rejects (e.g. integers above 64 bits)."""
+    if orjson_dumps is not None:
+        try:
+            return orjson_dumps(rows, option=OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+
+    return json_dumps(rows)
+
+
+def _load_json_rows(data: Union[str, bytes]) -> Tuple[list, bool]:
+    """Parses rows that are written back to the file. json is used instead of orjson,
+    which rejects NaN and reads integers above 64 bits as floats.
+
+    Returns:
+        Tuple[list, bool]: The rows and if they contain NaN or Infinity, which orjson
+                           would serialize as null.
+    """
+    constants = []
+    rows = loads(
+        data, parse_constant=lambda name: constants.append(name) or float(name)
+    )
+
+    return rows, bool(constants)
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _delete_in_batches(
+    s3_client, bucket_name: str, delete_specs: Iterable[dict], max_concurrency: int
+) -> None:
+    """Sends the delete specs in batches of MAX_DELETE_OBJECTS with up to max_concurrency
+    requests in flight. Uses the client because resources are not thread safe.
+    """
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = set()
+
+        for batch in _chunks(delete_specs, MAX_DELETE_OBJECTS):
+            if len(pending) >= max_concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+
+            pending.add(
+                executor.submit(
+                    s3_client.delete_objects,
+                    Bucket=bucket_name,
+                    Delete={"Objects": batch, "Quiet": True},
+                )
+            )
+
+        for future in wait(pending).done:
+            future.result()
+
 
 class S3Bucket(Aws):
     def __init__(self, bucket_name: str, **kwargs) -> None:
@@ -25,67 +111,123 @@ class S3Bucket(Aws):
         self.class_private_vars()["_bucket_name"] = bucket_name
         self.class_private_vars()["_Bucket"] = self.resource.Bucket(self.bucket_name)
 
-    def list_objects(self) -> list:
+    def iter_objects(self, Prefix: str = None, PageSize: int = 1000) -> Iterator:
+        """Iterates the objects in the bucket, requesting one page at a time.
+
+        Args:
+            Prefix (str, optional): Only objects whose key starts with the prefix. Defaults to None.
+            PageSize (int, optional): Objects requested per page. Defaults to 1000.
+
+        Returns:
+            Iterator
+        """
+        objects = (
+            self.Bucket.objects.all()
+            if Prefix is None
+            else self.Bucket.objects.filter(Prefix=Prefix)
+        )
+        return iter(objects.page_size(PageSize))
+
+    def iter_object_versions(
+        self, Prefix: str = None, PageSize: int = 1000
+    ) -> Iterator:
+        """Iterates the objects including versioning objects in the bucket, requesting one
+        page at a time.
+
+        Args:
+            Prefix (str, optional): Only objects whose key starts with the prefix. Defaults to None.
+            PageSize (int, optional): Versions requested per page. Defaults to 1000.
+
+        Returns:
+            Iterator
+        """
+        object_versions = (
+            self.Bucket.object_versions.all()
+            if Prefix is None
+            else self.Bucket.object_versions.filter(Prefix=Prefix)
+        )
+        return iter(object_versions.page_size(PageSize))
+
+    def list_objects(self, Prefix: str = None) -> list:
         """List all the objects in the bucket that exists in the bucket.
+        Use iter_objects to avoid loading every object in memory.
+
+        Args:
+            Prefix (str, optional): Only objects whose key starts with the prefix. Defaults to None.
 
         Returns:
             list
         """
-        return list(self.Bucket.objects.all())
+        return list(self.iter_objects(Prefix=Prefix))
 
-    def list_objects_versions(self) -> list:
+    def list_objects_versions(self, Prefix: str = None) -> list:
         """Lists all the objects including versioning objects that are in the bucket.
+        Use iter_object_versions to avoid loading every version in memory.
+
+        Args:
+            Prefix (str, optional): Only objects whose key starts with the prefix. Defaults to None.
 
         Returns:
             list
         """
-        return list(self.Bucket.object_versions.all())
+        return list(self.iter_object_versions(Prefix=Prefix))
 
     def put(self, Body: Union[str, bytes], Key: str, **kwargs):
         self.Bucket.put_object(Body=Body, Key=Key, **kwargs)
 
+    def _iter_delete_specs(
+        self,
+        keys_to_delete: list,
+        delete_all_objects_in_bucket: bool,
+        delete_all_versions: bool,
+    ) -> Iterator[dict]:
+        if delete_all_versions:
+            keyset = frozenset(keys_to_delete)
+
+            if len(keyset) <= MAX_KEYS_LISTED_BY_PREFIX:
+                return (
+                    {"Key": item.object_key, "VersionId": item.id}
+                    for key in keyset
+                    for item in self.iter_object_versions(Prefix=key)
+                    if item.object_key == key  # Prefix also matches sibling keys
+                )
+
+            return (
+                {"Key": item.object_key, "VersionId": item.id}
+                for item in self.iter_object_versions()
+                if item.object_key in keyset
+            )
+
+        if delete_all_objects_in_bucket:
+            return (
+                {"Key": item.object_key, "VersionId": item.id}
+                for item in self.iter_object_versions()
+            )
+
+        return ({"Key": key} for key in keys_to_delete)
+
     def delete_objects(
         self,
         keys_to_delete: list,
         delete_all_objects_in_bucket: bool = False,
         delete_all_versions=False,
+        max_concurrency: int = 8,
     ) -> None:
-        """Method to delete objects from the bucket.
+        """Method to delete objects from the bucket. Keys are sent in batches of MAX_DELETE_OBJECTS.
 
         Args:
             keys_to_delete (list): Name of the objects to delete.
             delete_all_objects_in_bucket (bool, optional): Deletes all objects and versions from the bucket. Defaults to False.
             delete_all_versions (bool, optional): Deletes the objects and the versions of the objects. Defaults to False.
+            max_concurrency (int, optional): Batches deleted at the same time. Defaults to 8.
         """
-        if delete_all_versions:
-
-            def object_filter_map(item):
-                if item.object_key in keys_to_delete:
-                    return {"Key": item.object_key, "VersionId": item.id}
-
-            keys = list(
-                filter(None, map(object_filter_map, self.list_objects_versions()))
-            )
-
-        elif delete_all_objects_in_bucket:
-            keys = list(
-                filter(
-                    None,
-                    map(
-                        lambda x: {"Key": x.object_key, "VersionId": x.id},
-                        self.list_objects_versions(),
-                    ),
-                )
-            )
-        else:
-            keys = [{"Key": key} for key in keys_to_delete]
-
-        params = {
-            "Objects": keys,
-            "Quiet": True,
-        }
+        delete_specs = self._iter_delete_specs(
+            keys_to_delete, delete_all_objects_in_bucket, delete_all_versions
+        )
 
-        self.Bucket.delete_objects(Delete=params)
+        _delete_in_batches(
+            self.Bucket.meta.client, self.bucket_name, delete_specs, max_concurrency
+        )
 
     def copy_object(
         self,
@@ -111,11 +253,39 @@ class S3Bucket(Aws):
             bucket = self.Bucket
         bucket.copy(copy_source, target_key_name, **kwargs)
 
-    def upload_file(self, file_path: str, key_name: str, **kwargs) -> None:
-        self.Bucket.upload_file(file_path, key_name, **kwargs)
+    def upload_file(
+        self,
+        file_path: str,
+        key_name: str,
+        Config: TransferConfig = FILE_TRANSFER_CONFIG,
+        **kwargs,
+    ) -> None:
+        """Method to upload a local file. Files above the multipart threshold of Config are
+        uploaded in parts, max_concurrency parts at a time.
 
-    def download_file(self, file_path: str, key_name: str, **kwargs) -> None:
-        self.Bucket.download_file(file_path, key_name, **kwargs)
+        Args:
+            file_path (str)
+            key_name (str)
+            Config (TransferConfig, optional): Defaults to FILE_TRANSFER_CONFIG.
+        """
+        self.Bucket.upload_file(file_path, key_name, Config=Config, **kwargs)
+
+    def download_file(
+        self,
+        file_path: str,
+        key_name: str,
+        Config: TransferConfig = FILE_TRANSFER_CONFIG,
+        **kwargs,
+    ) -> None:
+        """Method to download an object to a local file. Objects above the multipart threshold
+        of Config are downloaded in ranges, max_concurrency ranges at a time.
+
+        Args:
+            file_path (str)
+            key_name (str)
+            Config (TransferConfig, optional): Defaults to FILE_TRANSFER_CONFIG.
+        """
+        self.Bucket.download_file(file_path, key_name, Config=Config, **kwargs)
 
 
 class S3Object(Aws):
@@ -153,17 +323,24 @@ class S3Object(Aws):
         """Method to soft delete the object."""
         self._delete()
 
-    def delete_all_versions(self, confirm=False) -> None:
+    def delete_all_versions(self, confirm=False, max_concurrency: int = 8) -> None:
         """Method to delete ALL the versions of this file.
 
         Args:
             confirm (bool, optional): Argument must be set to True in order to delete all versions of the object. Defaults to False.
+            max_concurrency (int, optional): Batches of versions deleted at the same time. Defaults to 8.
         """
         if confirm:
-            [
-                self._delete(VersionId=item.id)
-                for item in self.Object.Bucket().object_versions.filter(Prefix=self.key)
-            ]
+            bucket = self.Object.Bucket()
+            versions = (
+                {"Key": item.object_key, "VersionId": item.id}
+                for item in bucket.object_versions.filter(Prefix=self.key)
+                if item.object_key == self.key  # Prefix also matches sibling keys
+            )
+
+            _delete_in_batches(
+                self.Object.meta.client, self.bucket_name, versions, max_concurrency
+            )
 
     def delete_object(self) -> None:
         """Method to permanently delete the current version id of the file."""
@@ -209,17 +386,22 @@ class S3Object(Aws):
 @dataclass
 class S3FileAppendData:
     S3Object: Union[S3Object, TextIOWrapper]
+    max_concurrency: int = 8
     rows_to_append: list = field(init=False)
     writer: Callable = field(init=False)
     new_file: bool = field(init=False)
+    has_new_content: bool = field(init=False)
     is_csv: bool = field(init=False)
     is_json: bool = field(init=False)
-    csvio: Union[StringIO, TextIOWrapper] = field(init=False)
+    has_constants: bool = field(init=False)
+    csvio: TextIOWrapper = field(init=False)
 
     def __post_init__(self):
 
         self.is_csv = False
         self.is_json = False
+        self.has_constants = False
+        existing_csv = None
 
         if isinstance(self.S3Object, TextIOWrapper):
 
@@ -231,7 +413,9 @@ class S3FileAppendData:
                 self.is_csv = True
 
             if self.S3Object.key.endswith(".json"):
-                existing_rows = load(self.S3Object)
+                existing_rows, self.has_constants = _load_json_rows(
+                    self.S3Object.read()
+                )
                 self.is_json = True
 
             if existing_rows:
@@ -251,43 +435,78 @@ class S3FileAppendData:
             try:
 
                 if self.is_csv:
-                    existing_rows = list(
-                        reader(
-                            codecs.getreader("utf-8")(
-                                self.S3Object.get_object()["Body"]
-                            )
+                    # The existing bytes are copied as is, new rows are written after them.
+                    existing_csv = BytesIO()
+                    existing_csv.writelines(
+                        self.S3Object.get_object()["Body"].iter_chunks(
+                            chunk_size=READ_CHUNK_SIZE
                         )
                     )
+                    existing_rows = None
+
+                    if existing_csv.tell() > 0:
+                        existing_csv.seek(existing_csv.tell() - 1)
+
+                        if existing_csv.read(1) != b"\n":
+                            existing_csv.write(b"\r\n")
 
                 if self.is_json:
-                    existing_rows = load(self.S3Object.get_object()["Body"])
+                    existing_rows, self.has_constants = _load_json_rows(
+                        self.S3Object.get_object()["Body"].read()
+                    )
 
                 self.new_file = False
 
-            except Exception:
+            except ClientError as error:
+                if error.response["Error"]["Code"] not in NEW_FILE_ERROR_CODES:
+                    raise
+
                 self.new_file = True
                 existing_rows = []
+                existing_csv = None
         else:
             raise TypeError(f"Instance {type(self.S3Object)} not implemented.")
 
         self.rows_to_append = []
+        self.has_new_content = False
 
         if not any([self.is_csv, self.is_json]):
             raise TypeError("File type is not implemented")
 
         if self.is_csv:
-            self.csvio = StringIO()
+            self.csvio = TextIOWrapper(
+                BytesIO() if existing_csv is None else existing_csv,
+                encoding="utf-8",
+                newline="",
+                write_through=True,
+            )
             self.writer = writer(self.csvio)
 
-            if not self.new_file:
+            if not self.new_file and existing_csv is None:
                 self.writer.writerows(existing_rows)
 
         if self.is_json:
             self.rows_to_append.extend(existing_rows)
 
     def write_content_to_s3(self) -> None:
-        """Internal Method to write new data to the S3 file."""
-        self.S3Object.Object.put(Body=self.return_data_to_s3())
+        """Internal Method to write new data to the S3 file.
+        Files above MULTIPART_SIZE are uploaded in parts, max_concurrency parts at a time.
+        Nothing is uploaded if no rows or headers were added.
+        """
+        if not self.has_new_content:
+            return
+
+        data = self.return_data_to_s3()
+
+        self.S3Object.Object.upload_fileobj(
+            BytesIO(data.encode("utf-8") if isinstance(data, str) else data),
+            Config=TransferConfig(
+                multipart_threshold=MULTIPART_SIZE,
+                multipart_chunksize=MULTIPART_SIZE,
+                max_concurrency=self.max_concurrency,
+                use_threads=True,
+            ),
+        )
 
     def add_rows(self, new_rows: list, append=False) -> None:
         """Method to add rows to the object. New rows can be a list of lists/dicts if append is False.
@@ -298,8 +517,10 @@ class S3FileAppendData:
         """
         if append:
             self.rows_to_append.append(new_rows)
-        else:
+            self.has_new_content = True
+        elif new_rows:
             self.rows_to_append.extend(new_rows)
+            self.has_new_content = True
 
     def add_headers(self, headers: list) -> None:
         """Method to prepend headers to the existing rows. Only works if the file is New.
@@ -308,24 +529,36 @@ class S3FileAppendData:
             headers (list):
         """
         if self.new_file:  # Avoids inserting rows in files that already exist
-            self.existing_rows.insert(0, headers)
+            if self.is_csv:
+                # Rows are only written on write_rows, so the headers end up first.
+                self.writer.writerow(headers)
+            else:
+                self.rows_to_append.insert(0, headers)
+
+            self.has_new_content = True
 
     def write_rows(self) -> None:
         """Method to write the rows stored in the object to the writer attribute."""
+        if not self.rows_to_append:
+            return
+
         if self.is_csv:
             self.writer.writerows(self.rows_to_append)
 
-    def return_data_to_s3(self) -> str:
-        """Returns the value stored in the StringIO object.
+    def return_data_to_s3(self) -> Union[str, bytes]:
+        """Returns the encoded CSV content or the serialized JSON rows.
 
         Returns:
-            str
+            Union[str, bytes]: JSON is returned as str when serialized without orjson.
         """
         if self.is_csv:
-            return self.csvio.getvalue()
+            return self.csvio.buffer.getvalue()
 
         if self.is_json:
-            return dumps(self.rows_to_append)
+            if self.has_constants:
+                return json_dumps(self.rows_to_append)
+
+            return _dumps(self.rows_to_append)
 
     def close_file(self) -> None:
         if self.is_csv:
@@ -334,7 +567,7 @@ class S3FileAppendData:
 
 @contextmanager
 def S3FileAppendContextManager(
-    S3Object: S3Object, propagate_errors: bool
+    S3Object: S3Object, propagate_errors: bool, max_concurrency: int = 8
 ) -> S3FileAppendData:
     """Context manager to append data to CSV files stored in S3.
     Use the context manager object.add_rows(new_rows: list, append=False) to add new rows.
@@ -343,6 +576,7 @@ def S3FileAppendContextManager(
     Args:
         S3Object (S3Object)
         propagate_errors (bool): Propages error found within the context manager.
+        max_concurrency (int, optional): Parts uploaded at the same time for large files. Defaults to 8.
 
     Raises:
         Exception
@@ -351,7 +585,7 @@ def S3FileAppendContextManager(
         S3FileAppendData
     """
 
-    AwsObject = S3FileAppendData(S3Object=S3Object)
+    AwsObject = S3FileAppendData(S3Object=S3Object, max_concurrency=max_concurrency)
 
     try:
         yield AwsObject
@@ -1,9 +1,12 @@
-from json import loads
-
 from boto3 import client
 
 from general_utils.aws_wrappers.utils import Aws
 
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
 
 class AwsSecretManager(Aws):
     def __init__(self, secret_arn: str, **kwargs):
@@ -22,15 +25,25 @@ class AwsSecretManager(Aws):
         for key, value in secret_data.items():
 
             self.class_private_vars()[f"_{key}"] = value
+
+        self.class_private_vars()["_secret_dict"] = None
+
         return secret_data
 
+    def _get_secret_dict(self) -> dict:
+        # Parsed on first use, so plaintext and binary secrets can still be instantiated.
+        if self.secret_dict is None:
+            self.class_private_vars()["_secret_dict"] = loads(self.SecretString)
+
+        return self.secret_dict
+
     def get_secret_keys(self) -> list:
         """Method to get the keys in the secret.
 
         Returns:
             list
         """
-        return loads(self.SecretString).keys()
+        return self._get_secret_dict().keys()
 
     def get_secret_token(self, secret_key: str) -> str:
         """Method to extract the API token from the secret.
@@ -45,4 +58,4 @@ class AwsSecretManager(Aws):
             str
         """
 
-        return loads(self.SecretString)[secret_key]
+        return self._get_secret_dict()[secret_key]
@@ -1,6 +1,22 @@
+import asyncio
 from abc import ABC
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import AsyncExitStack
+from http.client import HTTPConnection
+from threading import Lock
 from urllib.parse import unquote_plus
-from typing import Tuple, Callable
+from typing import Tuple, Callable, Hashable
+
+import boto3
+from botocore.config import Config
+from urllib3 import connection as urllib3_connection
+
+try:
+    import aioboto3
+    from aiobotocore.config import AioConfig
+except ImportError:
+    aioboto3 = None
 
 CLIENTS_IMPLEMENTED = [
     "secretsmanager",
@@ -18,7 +34,41 @@ SKIP_KEY_ARGS = [
     "table_name",
     "stream_arn",
 ]
+_SKIP_KEY_ARGS = frozenset(SKIP_KEY_ARGS)
 RESOURCES_IMPLEMENTED = ["s3", "cloudwatch"]
+# Cheap identifying attributes shown by Aws.__repr__, in this order, when set.
+REPR_ATTRIBUTES = (
+    "service_name",
+    "bucket_name",
+    "key",
+    "KeyId",
+    "table_name",
+    "stream_arn",
+    "Name",
+)
+
+# Shared by every thread using a client. Keep it at or above the sum of the max_concurrency
+# and MAX_WORKERS values used at the same time on one client, or the extra requests wait
+# for a free connection instead of running in parallel.
+MAX_POOL_CONNECTIONS = 64
+MAX_RETRY_ATTEMPTS = (
+    10  # Adaptive mode also rate limits the client while it is throttled
+)
+HTTP_BLOCKSIZE = 1024 * 1024
+MAX_CACHED_CLIENTS = 32  # Least recently used clients past this number are dropped
+
+# boto3 sessions are not thread safe, every resource/client creation goes through the lock.
+_SESSION_LOCK = Lock()
+_CLIENTS = OrderedDict()
+_http_blocksize_increased = False
+
+
+def _maybe_unquote(value: str) -> str:
+    # Most keys have nothing to decode, skip unquote_plus for them.
+    if "%" in value or "+" in value:
+        return unquote_plus(value, encoding="utf-8")
+
+    return value
 
 
 def extract_bucket_file_name_from_event(record: dict) -> Tuple[str, str]:
@@ -30,25 +80,174 @@ def extract_bucket_file_name_from_event(record: dict) -> Tuple[str, str]:
     Returns:
         Tuple[str, str]
     """
-    key_name = unquote_plus(record["s3"]["object"]["key"], encoding="utf-8")
-    bucket_name = unquote_plus(record["s3"]["bucket"]["name"], encoding="utf-8")
+    key_name = _maybe_unquote(record["s3"]["object"]["key"])
+    bucket_name = _maybe_unquote(record["s3"]["bucket"]["name"])
 
     return key_name, bucket_name
 
 
+def _default_config_options(kwargs: dict) -> dict:
+    return {
+        "max_pool_connections": kwargs.pop(
+            "max_pool_connections", MAX_POOL_CONNECTIONS
+        ),
+        "retries": {"max_attempts": MAX_RETRY_ATTEMPTS, "mode": "adaptive"},
+        "tcp_keepalive": True,
+    }
+
+
+def _set_default_blocksize(function: Callable) -> None:
+    if function.__kwdefaults__ and "blocksize" in function.__kwdefaults__:
+        function.__kwdefaults__["blocksize"] = HTTP_BLOCKSIZE
+
+    code = function.__code__
+    positional_names = code.co_varnames[: code.co_argcount]
+
+    if function.__defaults__ and "blocksize" in positional_names:
+        defaults = list(function.__defaults__)
+        first_default = len(positional_names) - len(defaults)
+        defaults[positional_names.index("blocksize") - first_default] = HTTP_BLOCKSIZE
+        function.__defaults__ = tuple(defaults)
+
+
+def increase_http_blocksize() -> None:
+    """Raises the default send block size of the http.client and urllib3 connections
+    (8/16 KiB) to HTTP_BLOCKSIZE, so uploads are written in fewer and larger chunks.
+    This is a process-global change, it is applied once when the first wrapper is created.
+    """
+    global _http_blocksize_increased
+
+    if _http_blocksize_increased:
+        return
+
+    for connection_class in (
+        HTTPConnection,
+        urllib3_connection.HTTPConnection,
+        urllib3_connection.HTTPSConnection,
+    ):
+        _set_default_blocksize(connection_class.__init__)
+
+    _http_blocksize_increased = True
+
+
+def _freeze(value):
+    # Configs hash by identity, equal configs are keyed by their options instead.
+    if isinstance(value, Config):
+        return (type(value).__name__, _freeze(value._user_provided_options))
+
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+
+    return value
+
+
+def _kwargs_cache_key(args: tuple, kwargs: dict) -> Hashable:
+    try:
+        cache_key = (_freeze(args), _freeze(kwargs))
+        hash(cache_key)
+    except TypeError:
+        return None
+
+    return cache_key
+
+
+def _default_session() -> boto3.Session:
+    # Resolved on every call, boto3.setup_default_session can replace it at any time.
+    return boto3._get_default_session()
+
+
+def _create_resource(*args, **kwargs):
+    with _SESSION_LOCK:
+        return _default_session().resource(*args, **kwargs)
+
+
+def _create_client(cache_key: Hashable, *args, **kwargs):
+    """Clients are thread safe, so wrappers created with the same arguments and boto3
+    default session share one client and its connection pool. Up to MAX_CACHED_CLIENTS
+    clients are kept. A cache_key of None always creates a new client.
+    """
+    with _SESSION_LOCK:
+        session = _default_session()
+
+        if cache_key is None:
+            return session.client(*args, **kwargs)
+
+        cache_key = (session, cache_key)
+
+        if cache_key in _CLIENTS:
+            _CLIENTS.move_to_end(cache_key)
+        else:
+            _CLIENTS[cache_key] = session.client(*args, **kwargs)
+
+            if len(_CLIENTS) > MAX_CACHED_CLIENTS:
+                _CLIENTS.popitem(last=False)
+
+        return _CLIENTS[cache_key]
+
+
+class _PrivateVars(MutableMapping):
+    """View of the "_name" attributes of an Aws instance. Setting "_name" also stores the
+    value as "name" in the instance __dict__, so reading self.name is a plain attribute
+    lookup instead of a call to Aws.__getattr__. Names defined on the class are not mirrored.
+    """
+
+    def __init__(self, instance) -> None:
+        self._instance_vars = vars(instance)
+        self._instance_class = type(instance)
+
+    def __getitem__(self, key):
+        return self._instance_vars[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._instance_vars[key] = value
+
+        if key.startswith("_") and not hasattr(self._instance_class, key[1:]):
+            self._instance_vars[key[1:]] = value
+
+    def __delitem__(self, key) -> None:
+        del self._instance_vars[key]
+
+        if key.startswith("_"):
+            self._instance_vars.pop(key[1:], None)
+
+    def __iter__(self):
+        return (key for key in list(self._instance_vars) if key.startswith("_"))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
 class Aws(ABC):
     def __init__(self, aws_boto3: Callable, *args, **kwargs) -> None:
+        """
+        Args:
+            aws_boto3 (Callable): boto3 resource or client function.
+            **kwargs: Arguments to pass to the boto3 resource/client.
+                max_pool_connections (int, optional): Size of the connection pool kept alive by the
+                    resource/client. Defaults to MAX_POOL_CONNECTIONS.
+                config (Config, optional): Merged on top of the default config.
+        """
+        increase_http_blocksize()
 
-        for key in kwargs:
-            if key in SKIP_KEY_ARGS:
-                del kwargs[key]
+        boto3_function_name = aws_boto3.__name__
+        kwargs = {k: v for k, v in kwargs.items() if k not in _SKIP_KEY_ARGS}
+
+        default_config = Config(**_default_config_options(kwargs))
+        kwargs["config"] = (
+            default_config.merge(kwargs["config"])
+            if "config" in kwargs
+            else default_config
+        )
 
         private_components = {f"_{k}": v for k, v in kwargs.items()}
-        self.__dict__.update(private_components)
-        self.__dict__["_args"] = args
+        self.class_private_vars().update(private_components)
+        self.class_private_vars()["_args"] = args
 
-        if aws_boto3.__name__ == "resource":
-            self.__dict__["_resource"] = aws_boto3(
+        if boto3_function_name == "resource":
+            self.class_private_vars()["_resource"] = _create_resource(
                 *self._return_args(), **self._return_kargs()
             )
             if self.resource.meta.service_name not in RESOURCES_IMPLEMENTED:
@@ -56,9 +255,10 @@ class Aws(ABC):
                     "Wrapper for this resource has not been implemented"
                 )
 
-        elif aws_boto3.__name__ == "client":
-            self.__dict__["_client"] = aws_boto3(
-                *self._return_args(), **self._return_kargs()
+        elif boto3_function_name == "client":
+            args, kwargs = self._return_args(), self._return_kargs()
+            self.class_private_vars()["_client"] = _create_client(
+                _kwargs_cache_key(args, kwargs), *args, **kwargs
             )
 
             if self.client.meta.service_model.service_name not in CLIENTS_IMPLEMENTED:
@@ -78,15 +278,15 @@ class Aws(ABC):
         raise AttributeError(f"Cannot delete attribute {name!r}")
 
     def __repr__(self):
+        # Only scalar identifiers, formatting the boto3 objects can be expensive.
+        instance_vars = self.__dict__
 
         return "{}({})".format(
             type(self).__name__,
             ", ".join(
-                "{k}={v}".format(
-                    k=k[1:],
-                    v=v,
-                )
-                for k, v in self.__dict__.items()
+                f"{name}={instance_vars[f'_{name}']!r}"
+                for name in REPR_ATTRIBUTES
+                if f"_{name}" in instance_vars
             ),
         )
 
@@ -96,13 +296,82 @@ class Aws(ABC):
 
     def _return_kargs(self):
 
-        return {f"{k[1:]}": v for k, v in self.__dict__.items() if k not in ["_args"]}
+        return {
+            f"{k[1:]}": v
+            for k, v in self.class_private_vars().items()
+            if k not in ["_args"]
+        }
 
-    def class_private_vars(self) -> dict:
+    def class_private_vars(self) -> MutableMapping:
         """Method to return a dictionary with all the args and kwargs.
             Method allows the modification of the attribute values.
 
         Returns:
-            dict
+            MutableMapping
+        """
+        return _PrivateVars(self)
+
+
+class AwsAsync(Aws):
+    def __init__(self, service_name: str, **kwargs) -> None:
+        """Base class for the async wrappers. The client is created when entering
+        the async context manager. If aioboto3 is not installed, the boto3 client
+        is used and its calls run in a worker thread.
+
+        Args:
+            service_name (str): Name of the AWS client.
+            **kwargs: Arguments to pass to the client.
+                max_pool_connections (int, optional): Defaults to MAX_POOL_CONNECTIONS.
+                config (Config, optional): Merged on top of the default config.
         """
-        return vars(self)
+        kwargs = {k: v for k, v in kwargs.items() if k not in _SKIP_KEY_ARGS}
+
+        config_options = _default_config_options(kwargs)
+        default_config = (
+            Config(**config_options)
+            if aioboto3 is None
+            else AioConfig(**config_options)
+        )
+        kwargs["config"] = (
+            default_config.merge(kwargs["config"])
+            if "config" in kwargs
+            else default_config
+        )
+
+        self.class_private_vars()["_service_name"] = service_name
+        self.class_private_vars()["_client_kwargs"] = kwargs
+        self.class_private_vars()["_client"] = None
+        self.class_private_vars()["_exit_stack"] = AsyncExitStack()
+
+    async def __aenter__(self):
+        if aioboto3 is None:
+            # Creating a client loads the service model, keep it off the event loop.
+            self.class_private_vars()["_client"] = await asyncio.to_thread(
+                _create_client,
+                _kwargs_cache_key((self.service_name,), self.client_kwargs),
+                self.service_name,
+                **self.client_kwargs,
+            )
+        else:
+            self.class_private_vars()["_client"] = (
+                await self.exit_stack.enter_async_context(
+                    aioboto3.Session().client(self.service_name, **self.client_kwargs)
+                )
+            )
+
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.exit_stack.aclose()
+        self.class_private_vars()["_client"] = None
+
+    async def _call(self, method_name: str, **kwargs) -> dict:
+        if self.client is None:
+            raise RuntimeError(f"{type(self).__name__} must be used with 'async with'")
+
+        method = getattr(self.client, method_name)
+
+        if aioboto3 is None:
+            return await asyncio.to_thread(method, **kwargs)
+
+        return await method(**kwargs)
@@ -1,6 +1,7 @@
 from aws_lambda_powertools import Logger
 from typing import Callable
 from functools import wraps
+from random import random
 from time import sleep
 
 
@@ -8,11 +9,20 @@ class HtmlResponseObject:
     pass
 
 
-def api_multi_call_decorator(times_to_retry: int) -> HtmlResponseObject:
+def _backoff_delay(base_delay: float, attempt: int) -> float:
+    """Exponential backoff with jitter for the given 1-based attempt."""
+    return base_delay * (2 ** (attempt - 1)) * (0.5 + random())
+
+
+def api_multi_call_decorator(
+    times_to_retry: int, backoff: float = 0
+) -> HtmlResponseObject:
     """Decorator to call the API multiple times if the response code is not 200s.
 
     Args:
         times_to_retry (int)
+        backoff (float, optional): Base delay in seconds between attempts, doubled on every
+            retry and jittered. Defaults to 0 (no delay).
     Raises:
             Exception: If the number of max attempts is reached without 200 response
     Returns:
@@ -34,7 +44,7 @@ def api_multi_call_decorator(times_to_retry: int) -> HtmlResponseObject:
                 if attempt == times_to_retry:
 
                     raise Exception(
-                        f"API retry attempts exceeded. Error: {response.text if 'text' in dir(response) else 'No info on this error'}"
+                        f"API retry attempts exceeded. Error: {getattr(response, 'text', 'No info on this error')}"
                     )
 
                 response = payload_object(*args, **kwargs)
@@ -45,6 +55,9 @@ def api_multi_call_decorator(times_to_retry: int) -> HtmlResponseObject:
 
                 attempt += 1
 
+                if backoff and attempt < times_to_retry:
+                    sleep(_backoff_delay(backoff, attempt))
+
             return response
 
         return multi_attempt_api_call
@@ -63,7 +76,8 @@ def function_retry_decorator(
     Args:
         max_attempts (int)
         logger (Logger)
-        time_between_attempts (int)
+        time_between_attempts (int): Base delay in seconds, doubled on every retry and jittered.
+            No delay follows the last attempt.
         kill_execution (bool)
 
     Returns:
@@ -75,6 +89,19 @@ def function_retry_decorator(
         if max_attempts < 1:
             raise ValueError("max_attempts argument cannot be less than 1")
 
+        log_error = logger.error
+        failure_message = (
+            f"Failed to successfully call function. Killing process: {kill_execution}."
+        )
+
+        def kill_process(error: Exception) -> None:
+            exit(1)
+
+        def raise_error(error: Exception) -> None:
+            raise error
+
+        on_failure = kill_process if kill_execution else raise_error
+
         @wraps(function)
         def multi_attempt_function_call(*args, **kwargs) -> Callable:
 
@@ -83,19 +110,15 @@ def function_retry_decorator(
                     return function(*args, **kwargs)
                 except Exception as e:
                     error = e
-                    logger.error(
+                    log_error(
                         ex=error,
                         message=f"Exception raised during execution. Attempt: {attempt}.",
                     )
-                    sleep(time_between_attempts)
-            else:
-                logger.info(
-                    f"Failed to successfully call function. Killing process: {kill_execution}."
-                )
-                if kill_execution:
-                    exit(1)
-                else:
-                    raise error
+                    if attempt < max_attempts:
+                        sleep(_backoff_delay(time_between_attempts, attempt))
+
+            logger.info(failure_message)
+            on_failure(error)
 
         return multi_attempt_function_call
 
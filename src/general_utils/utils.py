@@ -1,47 +1,137 @@
+import re
+from functools import lru_cache
+from http.cookiejar import DefaultCookiePolicy
+from itertools import chain
 from os import path, path, makedirs
 from shutil import rmtree
-from requests import post, get, put
-from typing import Union, List, Callable
+from threading import Lock
+from time import monotonic
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+from typing import Union, List
 from math import ceil, floor
 from datetime import datetime
 from pathlib import Path
 
-from general_utils.decorators import api_multi_call_decorator
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
 
+CSV_EXTENSION = ".csv"
+HTTP_POOL_SIZE = 10  # Connections kept alive per host
+PATH_PARSE_CACHE_SIZE = 512
+TIMESTAMP_CACHE_WINDOW = 0.5  # Seconds a cached current_timestamp is reused
 
-def _extension_check(extension: str, extension_check: str) -> bool:
-    """Function to comapre if a file extension matches a specified extension.
+_HTTP_SESSION = None
+_HTTP_SESSION_LOCK = Lock()
+_TIMESTAMP_CACHE = {}  # use_utc -> (monotonic read time, datetime)
+_NON_DIGIT_RE = re.compile(r"\D+")
+_MULTISPACE_RE = re.compile(r" +")
+_POW10 = tuple(10**i for i in range(16))
 
-    Args:
-        extension (str)
-        extension_check (str): The extension we want to match.
+
+def _get_http_session() -> Session:
+    """Function to get the Session shared by the http requests, so connections are reused.
 
     Returns:
-        bool: If the extension matches the desired extension, True else False
+        Session
     """
-    return extension == extension_check
+    global _HTTP_SESSION
+
+    if _HTTP_SESSION is None:
+        with _HTTP_SESSION_LOCK:
+            if _HTTP_SESSION is None:
+                session = Session()
+                # Shared by unrelated callers, so cookies set by a response are not kept.
+                # Cookies passed to a request are still sent.
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_SIZE,
+                    pool_maxsize=HTTP_POOL_SIZE,
+                    max_retries=0,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _HTTP_SESSION = session
+
+    return _HTTP_SESSION
 
 
 def _http_request(
-    url: str, request_function: Callable, max_attempts: int, timeout: int, **kargs
-) -> dict:
-    """Function to perform http put request. If response is not 200, function retries N times specified by argument max_attempts
+    url: str, method: str, max_attempts: int, timeout: int, **kargs
+) -> Response:
+    """Function to perform http requests. If response is not 200, function retries N times specified by argument max_attempts.
+    Connection errors and timeouts are retried too, the last one is raised.
 
     Args:
         url (str)
-        request_function (Callable)
+        method (str): HTTP method, e.g. "GET".
         max_attempts (int)
         timeout (int)
 
+    Raises:
+        Exception: If the number of max attempts is reached without 200 response
+
     Returns:
-        dict
+        Response
     """
+    if max_attempts < 1:
+        raise ValueError("max_attempts argument cannot be less than 1")
+
+    request = _get_http_session().request
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            response = request(method, url, timeout=timeout, **kargs)
+        except (RequestsConnectionError, Timeout):
+            if attempt == max_attempts:
+                raise
+            continue
+
+        if 200 <= response.status_code < 300:
+            return response
+
+    raise Exception(
+        f"API retry attempts exceeded. Error: {getattr(response, 'text', 'No info on this error')}"
+    )
+
+
+def _is_simple_posix_path(file_name: str) -> bool:
+    # Paths that pathlib would not normalize, so splitting on the last "/" gives the same result.
+    return (
+        path.sep == "/"
+        and path.altsep is None
+        and type(file_name) is str
+        and file_name not in ("", ".")
+        and not file_name.endswith(("/", "/."))
+        and not file_name.startswith("./")
+        and "//" not in file_name
+        and "/./" not in file_name
+    )
+
+
+@lru_cache(maxsize=PATH_PARSE_CACHE_SIZE)
+def _path_parse(file_name: str, get_file_name: bool, get_folders: bool) -> str:
+    if _is_simple_posix_path(file_name):
+        folders, separator, name = file_name.rpartition("/")
 
-    @api_multi_call_decorator(max_attempts)
-    def get_wrapper():
-        return request_function(url, timeout=timeout, **kargs)
+        if get_file_name:
+            return name
 
-    return get_wrapper()
+        if get_folders:
+            return folders or ("/" if separator else ".")
+
+        return None
+
+    path_object = Path(file_name)
+
+    if get_file_name:
+        return str(path_object.name)
+
+    if get_folders:
+        return str(path_object.parent)
 
 
 def path_parse(
@@ -57,18 +147,12 @@ def path_parse(
     Returns:
         str
     """
-    if all([get_file_name, get_folders]):
+    if get_file_name and get_folders:
         raise ValueError(
             "get_file_name and get_folders cannot be both True at the same time."
         )
 
-    path_object = Path(file_name)
-
-    if get_file_name:
-        return str(path_object.name)
-
-    if get_folders:
-        return str(path_object.parent)
+    return _path_parse(file_name, get_file_name, get_folders)
 
 
 def file_name_parser(file_name: str, return_extension: bool = False) -> str:
@@ -81,23 +165,34 @@ def file_name_parser(file_name: str, return_extension: bool = False) -> str:
     Returns:
         str
     """
-    file_name_data_list = path.splitext(p=file_name)
+    dot_index = file_name.rfind(".")
+    name_index = file_name.rfind(path.sep) + 1
 
-    if return_extension:
+    if path.altsep:
+        name_index = max(name_index, file_name.rfind(path.altsep) + 1)
 
-        return file_name_data_list[-1]
+    # Same rules as os.path.splitext: dots leading the file name do not start an extension.
+    if dot_index <= name_index or not file_name[name_index:dot_index].strip("."):
+        return "" if return_extension else file_name
 
-    else:
-        return file_name_data_list[0]
+    return file_name[dot_index:] if return_extension else file_name[:dot_index]
 
 
-def path_join(*args: str) -> str:
+def path_join(a: str, b: str = None, c: str = None, *rest: str) -> str:
     """Function to join args in a path using the system format.
+    Up to three parts are joined without packing them into a tuple.
 
     Returns:
         str
     """
-    return path.join(*args)
+    if rest:
+        return path.join(a, b, c, *rest)
+    if c is not None:
+        return path.join(a, b, c)
+    if b is not None:
+        return path.join(a, b)
+
+    return path.join(a)
 
 
 def is_csv(file_name: str) -> bool:
@@ -109,9 +204,11 @@ def is_csv(file_name: str) -> bool:
     Returns:
         bool
     """
-    extension = file_name_parser(file_name=file_name, return_extension=True)
-
-    return _extension_check(extension=extension, extension_check=".csv")
+    # endswith rejects most names cheaply, splitext keeps names like ".csv" (no extension) False.
+    return (
+        file_name.endswith(CSV_EXTENSION)
+        and path.splitext(file_name)[1] == CSV_EXTENSION
+    )
 
 
 def get_file_size(file_path: str) -> int:
@@ -126,13 +223,14 @@ def get_file_size(file_path: str) -> int:
     return path.getsize(file_path)
 
 
-def create_directories(path: str) -> None:
+def create_directories(path: str, exist_ok: bool = True) -> None:
     """Function to create all directories necessary to make a path valid.
 
     Args:
         path (str)
+        exist_ok (bool, optional): If False, FileExistsError is raised when the path exists. Defaults to True.
     """
-    makedirs(path)
+    makedirs(path, exist_ok=exist_ok)
 
 
 def directory_exists(path_dir: str) -> bool:
@@ -159,13 +257,18 @@ def file_exists(path_file: str) -> bool:
     return path.isfile(path_file)
 
 
-def delete_path(path: str) -> None:
+def delete_path(path: str, missing_ok: bool = False) -> None:
     """Function to delete directory paths
 
     Args:
         path (str)
+        missing_ok (bool, optional): If True, a path that does not exist is ignored. Defaults to False.
     """
-    rmtree(path)
+    try:
+        rmtree(path)
+    except FileNotFoundError:
+        if not missing_ok:
+            raise
 
 
 def clean_str(
@@ -181,11 +284,7 @@ def clean_str(
         str
     """
     if isinstance(input, str):
-        if fill_underscore:
-            delim = "_"
-        else:
-            delim = " "
-        input = delim.join(filter(None, str(input).split(" ")))
+        input = _MULTISPACE_RE.sub("_" if fill_underscore else " ", input.strip(" "))
 
         return input.upper() if upper_case else input.lower()
     else:
@@ -199,11 +298,14 @@ def remove_non_digit_from_str(input: str) -> str:
     Returns:
         str
     """
-    return "".join(list(filter(lambda x: x.isdigit(), str(input))))
+    return _NON_DIGIT_RE.sub("", str(input))
 
 
 def current_timestamp(
-    iso_format: bool = False, string_format: str = None, use_utc: bool = False
+    iso_format: bool = False,
+    string_format: str = None,
+    use_utc: bool = False,
+    cached: bool = False,
 ) -> Union[datetime, str]:
     """Function to get the a time stamp in different formats.
 
@@ -212,11 +314,20 @@ def current_timestamp(
         string_format (str, optional): Function returns a string timestam based on the format codes given. Defaults to None.
                                         Reference: https://www.geeksforgeeks.org/python-strftime-function/
         use_utc (bool, optional): Time zone object returns UTC time.
+        cached (bool, optional): Reuse the time read in the last TIMESTAMP_CACHE_WINDOW seconds. Defaults to False.
 
     Returns:
         Union[datetime,str]: If iso_format or string_format:String else datetime object.
     """
-    datetime_object = datetime.utcnow() if use_utc else datetime.now()
+    if cached:
+        now = monotonic()
+        read_at, datetime_object = _TIMESTAMP_CACHE.get(use_utc, (None, None))
+
+        if read_at is None or now - read_at > TIMESTAMP_CACHE_WINDOW:
+            datetime_object = datetime.utcnow() if use_utc else datetime.now()
+            _TIMESTAMP_CACHE[use_utc] = (now, datetime_object)
+    else:
+        datetime_object = datetime.utcnow() if use_utc else datetime.now()
 
     if iso_format:
         value = datetime_object.isoformat()
@@ -243,22 +354,24 @@ def round_number(number: float, round_up: bool = False, decimals: int = 2) -> fl
     Returns:
         float
     """
-    if decimals < 0:
-        raise ValueError("Decimal places has to be 0 or more")
-    elif not isinstance(decimals, int):
+    if not isinstance(decimals, int):
         raise TypeError("Decimal places must be an integer")
-    elif decimals == 0:
-        return ceil(number) if round_up else floor(number)
+    elif decimals < 0:
+        raise ValueError("Decimal places has to be 0 or more")
 
-    factor = 10**decimals
+    rounding_function = ceil if round_up else floor
 
-    return (
-        ceil(number * factor) / factor if round_up else floor(number * factor) / factor
-    )
+    if decimals == 0:
+        return rounding_function(number)
+
+    factor = _POW10[decimals] if decimals < len(_POW10) else 10**decimals
+
+    return rounding_function(number * factor) / factor
 
 
 def dict_set(dict_list: List[dict]) -> List[dict]:
     """Function to generate a set from dictionaries without unique key identifier. Function only works with Flat dictionaries.
+    The first occurrence of every dictionary is kept, in the input order.
 
     Args:
         dict_list (List[dict])
@@ -266,7 +379,17 @@ def dict_set(dict_list: List[dict]) -> List[dict]:
     Returns:
         List[dict]
     """
-    return [dict(t) for t in set(tuple(sorted(d.items())) for d in dict_list)]
+    seen = set()
+    unique_dicts = []
+
+    for dictionary in dict_list:
+        items = frozenset(dictionary.items())
+
+        if items not in seen:
+            seen.add(items)
+            unique_dicts.append(dictionary)
+
+    return unique_dicts
 
 
 def filter_dict_or_dicts_in_list(
@@ -286,33 +409,22 @@ def filter_dict_or_dicts_in_list(
     Returns:
         Union[dict,list]
     """
-    if isinstance(input, list):
+    keys = frozenset(filter_dictionary_keys)
 
-        def subset_dict_filter(item):
-
-            if not isinstance(item, dict):
-                raise TypeError("item can only be dict instance.")
-
-            _ = {}
-
-            for key in item:
-
-                if key in filter_dictionary_keys:
-
-                    _[key] = item[key]
+    if isinstance(input, list):
 
-            if _:
-                return _
-            else:
-                return None
+        if not all(isinstance(item, dict) for item in input):
+            raise TypeError("item can only be dict instance.")
 
-        return list(filter(None, map(subset_dict_filter, input)))
+        return [
+            subset_dict
+            for item in input
+            if (subset_dict := {k: v for k, v in item.items() if k in keys})
+        ]
 
     elif isinstance(input, dict):
 
-        return {
-            key: value for key, value in input.items() if key in filter_dictionary_keys
-        }
+        return {key: value for key, value in input.items() if key in keys}
 
     else:
         raise TypeError(
@@ -320,6 +432,19 @@ def filter_dict_or_dicts_in_list(
         )
 
 
+def response_to_json(response: Response) -> Union[dict, list]:
+    """Function to decode the JSON body of a response, with orjson when it is installed.
+    Faster alternative to response.json() for the responses of the send_*_request functions.
+
+    Args:
+        response (Response)
+
+    Returns:
+        Union[dict, list]
+    """
+    return loads(response.content)
+
+
 def send_put_request(url: str, max_attempts: int, timeout: int, **kargs) -> dict:
     """Function to perform http put request. If response is not 200, function retries N times specified by argument max_attempts
 
@@ -333,7 +458,7 @@ def send_put_request(url: str, max_attempts: int, timeout: int, **kargs) -> dict
         dict
     """
     return _http_request(
-        url, request_function=put, timeout=timeout, max_attempts=max_attempts, **kargs
+        url, method="PUT", timeout=timeout, max_attempts=max_attempts, **kargs
     )
 
 
@@ -350,7 +475,7 @@ def send_get_request(url: str, max_attempts: int, timeout: int, **kargs) -> dict
         dict
     """
     return _http_request(
-        url, request_function=get, timeout=timeout, max_attempts=max_attempts, **kargs
+        url, method="GET", timeout=timeout, max_attempts=max_attempts, **kargs
     )
 
 
@@ -368,7 +493,7 @@ def send_post_request(url: str, max_attempts: int, timeout: int, **kargs) -> dic
     """
     return _http_request(
         url,
-        request_function=post,
+        method="POST",
         timeout=timeout,
         max_attempts=max_attempts,
         **kargs,
@@ -388,21 +513,31 @@ def nested_dict_to_flat(dictionary: dict, mapping_dict: dict = None) -> dict:
     Yields:
         Iterator[dict]
     """
-    for key, value in dictionary.items():
+    # Explicit stack of (items iterator, mapping) pairs instead of recursive generators,
+    # nested levels are finished before their parent continues, as in a recursive walk.
+    stack = [(iter(dictionary.items()), mapping_dict)]
 
-        if key in mapping_dict:
+    while stack:
+        items, mapping = stack[-1]
 
-            if type(value) is dict:
+        for key, value in items:
 
-                yield from nested_dict_to_flat(value, mapping_dict=mapping_dict[key])
+            if key not in mapping:
+                continue
 
-            elif type(value) is list:
+            value_type = type(value)
 
-                for dictionary in value:
+            if value_type is dict:
+                stack.append((iter(value.items()), mapping[key]))
+                break
 
-                    yield from nested_dict_to_flat(
-                        dictionary, mapping_dict=mapping_dict[key]
-                    )
-            else:
+            elif value_type is list:
+                stack.append(
+                    (chain.from_iterable(item.items() for item in value), mapping[key])
+                )
+                break
 
-                yield (mapping_dict[key], value)
+            else:
+                yield (mapping[key], value)
+        else:
+            stack.pop()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The aws_wrappers modules import general_utils absolutely, like an installed package.
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
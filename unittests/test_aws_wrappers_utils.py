@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+import boto3
+import pytest
+from botocore.config import Config
+
+from general_utils.aws_wrappers import utils as aws_utils
+
+AWS_KWARGS = {
+    "region_name": "us-east-1",
+    "aws_access_key_id": "testing",
+    "aws_secret_access_key": "testing",
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_client_cache(monkeypatch):
+
+    monkeypatch.setattr(aws_utils, "_CLIENTS", OrderedDict())
+
+
+def _kms_client(**kwargs):
+
+    return aws_utils.Aws(boto3.client, "kms", **{**AWS_KWARGS, **kwargs}).client
+
+
+def test_wrappers_with_the_same_arguments_share_a_client():
+
+    assert _kms_client() is _kms_client()
+    assert _kms_client() is not _kms_client(region_name="eu-west-1")
+
+
+def test_equal_configs_share_a_client():
+
+    client = _kms_client(config=Config(read_timeout=5))
+
+    assert _kms_client(config=Config(read_timeout=5)) is client
+    assert _kms_client(config=Config(read_timeout=6)) is not client
+    assert len(aws_utils._CLIENTS) == 2
+
+
+def test_least_recently_used_client_is_evicted(monkeypatch):
+
+    monkeypatch.setattr(aws_utils, "MAX_CACHED_CLIENTS", 2)
+    first = _kms_client(region_name="us-east-1")
+    second = _kms_client(region_name="us-east-2")
+
+    assert _kms_client(region_name="us-east-1") is first
+
+    _kms_client(region_name="us-west-1")
+
+    assert len(aws_utils._CLIENTS) == 2
+    assert _kms_client(region_name="us-east-1") is first
+    assert _kms_client(region_name="us-east-2") is not second
+
+
+def test_clients_use_the_boto3_default_session(monkeypatch):
+
+    monkeypatch.setattr(boto3, "DEFAULT_SESSION", None)
+    boto3.setup_default_session(
+        region_name="eu-west-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+
+    client = aws_utils.Aws(boto3.client, "kms").client
+
+    assert client.meta.region_name == "eu-west-1"
+    assert aws_utils.Aws(boto3.client, "kms").client is client
+
+    boto3.setup_default_session(
+        region_name="eu-west-2",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+
+    assert aws_utils.Aws(boto3.client, "kms").client.meta.region_name == "eu-west-2"
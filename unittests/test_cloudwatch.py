@@ -0,0 +1,273 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from queue import Queue
+
+import pytest
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.stub import ANY, Stubber
+
+from general_utils.aws_wrappers import cloudwatch
+
+AWS_KWARGS = {
+    "region_name": "us-east-1",
+    "aws_access_key_id": "testing",
+    "aws_secret_access_key": "testing",
+}
+
+
+@pytest.fixture
+def stubbed_cloudwatch():
+    """Yields a CloudWatchResource and the Stubber of its client. The values left buffered
+    are discarded, so the exit handler does not try to send them.
+    """
+    cloudwatch_resource = cloudwatch.CloudWatchResource(
+        Logger(service="test"), **AWS_KWARGS
+    )
+
+    with Stubber(cloudwatch_resource.resource.meta.client) as stubber:
+        yield cloudwatch_resource, stubber
+
+        stubber.assert_no_pending_responses()
+
+    cloudwatch_resource.pending_datums.clear()
+    cloudwatch._UNFLUSHED_RESOURCES.discard(cloudwatch_resource)
+
+
+def _put_values(cloudwatch_resource, count: int) -> None:
+    for value in range(count):
+        cloudwatch_resource.put_metric_data("namespace", "metric", value, "Count")
+
+
+def _fail_with_connection_error(cloudwatch_resource, stubber) -> None:
+    def raise_connection_error(**kwargs):
+        raise EndpointConnectionError(endpoint_url="https://monitoring")
+
+    # The client is not shared, each CloudWatchResource creates its own resource.
+    cloudwatch_resource.resource.meta.client.put_metric_data = raise_connection_error
+
+
+def _fail_with_server_error(cloudwatch_resource, stubber) -> None:
+    stubber.add_client_error("put_metric_data", "InternalFailure", http_status_code=500)
+
+
+def _fail_with_throttling(cloudwatch_resource, stubber) -> None:
+    stubber.add_client_error("put_metric_data", "Throttling", http_status_code=400)
+
+
+def test_put_metric_data_flushes_full_batches(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    _put_values(cloudwatch_resource, cloudwatch.MAX_METRIC_DATUMS - 1)
+
+    assert len(cloudwatch_resource.pending_datums) == cloudwatch.MAX_METRIC_DATUMS - 1
+
+    stubber.add_response(
+        "put_metric_data", {}, {"Namespace": "namespace", "MetricData": ANY}
+    )
+    _put_values(cloudwatch_resource, 1)
+
+    assert not cloudwatch_resource.pending_datums
+
+
+@pytest.mark.parametrize(
+    "fail",
+    [_fail_with_connection_error, _fail_with_server_error, _fail_with_throttling],
+)
+def test_flush_keeps_values_buffered_on_transient_errors(stubbed_cloudwatch, fail):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    _put_values(cloudwatch_resource, 3)
+    buffered = list(cloudwatch_resource.pending_datums)
+    fail(cloudwatch_resource, stubber)
+
+    with pytest.raises((ClientError, EndpointConnectionError)):
+        cloudwatch_resource.flush()
+
+    assert list(cloudwatch_resource.pending_datums) == buffered
+    assert cloudwatch_resource.dropped_metrics == 0
+
+
+def test_put_metric_data_does_not_raise_for_buffered_values(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    _fail_with_server_error(cloudwatch_resource, stubber)
+    _put_values(cloudwatch_resource, cloudwatch.MAX_METRIC_DATUMS + 1)
+
+    assert len(cloudwatch_resource.pending_datums) == cloudwatch.MAX_METRIC_DATUMS + 1
+
+
+def test_flush_drops_rejected_values(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    _put_values(cloudwatch_resource, 3)
+    stubber.add_client_error(
+        "put_metric_data", "InvalidParameterValue", http_status_code=400
+    )
+
+    cloudwatch_resource.flush()
+
+    assert not cloudwatch_resource.pending_datums
+    assert cloudwatch_resource.dropped_metrics == 3
+
+
+def test_requeued_values_are_capped(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    cloudwatch_resource.pending_datums.extend(
+        ("namespace", {"MetricName": "metric", "Value": value})
+        for value in range(cloudwatch.MAX_PENDING_DATUMS + 5)
+    )
+    _fail_with_server_error(cloudwatch_resource, stubber)
+
+    with pytest.raises(ClientError):
+        cloudwatch_resource.flush()
+
+    assert len(cloudwatch_resource.pending_datums) == cloudwatch.MAX_PENDING_DATUMS
+    assert cloudwatch_resource.pending_datums[0][1]["Value"] == 5
+    assert cloudwatch_resource.dropped_metrics == 5
+
+
+def test_buffered_values_are_flushed_at_exit(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    _put_values(cloudwatch_resource, 3)
+    stubber.add_response(
+        "put_metric_data", {}, {"Namespace": "namespace", "MetricData": ANY}
+    )
+
+    cloudwatch._flush_unflushed_resources()
+
+    assert not cloudwatch_resource.pending_datums
+    assert cloudwatch_resource not in cloudwatch._UNFLUSHED_RESOURCES
+
+
+def test_get_metric_data_merges_pages(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    start, end = datetime(2026, 1, 1), datetime(2026, 1, 2)
+    request = {"MetricDataQueries": ANY, "StartTime": start, "EndTime": end}
+    stubber.add_response(
+        "get_metric_data",
+        {
+            "MetricDataResults": [
+                {
+                    "Id": "m0",
+                    "Timestamps": [start],
+                    "Values": [1.0],
+                    "StatusCode": "PartialData",
+                    "Messages": [{"Code": "first", "Value": "page"}],
+                }
+            ],
+            "NextToken": "token",
+        },
+        request,
+    )
+    stubber.add_response(
+        "get_metric_data",
+        {
+            "MetricDataResults": [
+                {
+                    "Id": "m0",
+                    "Timestamps": [end],
+                    "Values": [2.0],
+                    "StatusCode": "Complete",
+                    "Messages": [{"Code": "last", "Value": "page"}],
+                }
+            ]
+        },
+        {**request, "NextToken": "token"},
+    )
+
+    results = cloudwatch_resource.get_metric_data(
+        [{"namespace": "namespace", "name": "metric", "period": 60, "stat": "Sum"}],
+        start,
+        end,
+    )
+
+    assert results == [
+        {
+            "Id": "m0",
+            "Timestamps": [start, end],
+            "Values": [1.0, 2.0],
+            "StatusCode": "Complete",
+            "Messages": [
+                {"Code": "first", "Value": "page"},
+                {"Code": "last", "Value": "page"},
+            ],
+        }
+    ]
+
+
+def test_wait_for_async_metrics_sends_queued_values(stubbed_cloudwatch):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    stubber.add_response(
+        "put_metric_data", {}, {"Namespace": "namespace", "MetricData": ANY}
+    )
+
+    for value in range(3):
+        assert cloudwatch_resource.put_metric_data_async(
+            "namespace", "metric", value, "Count"
+        )
+
+    cloudwatch_resource.wait_for_async_metrics()
+
+    assert cloudwatch_resource.dropped_metrics == 0
+
+
+def test_put_metric_data_async_counts_values_dropped_by_a_full_queue(
+    stubbed_cloudwatch, monkeypatch
+):
+
+    cloudwatch_resource, stubber = stubbed_cloudwatch
+    # A queue that no worker drains, full after its first value.
+    monkeypatch.setattr(cloudwatch, "_METRIC_QUEUE", Queue(maxsize=1))
+    monkeypatch.setattr(cloudwatch, "_METRIC_WORKER", object())
+
+    def put_values(count):
+        return [
+            cloudwatch_resource.put_metric_data_async(
+                "namespace", "metric", value, "Count"
+            )
+            for value in range(count)
+        ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = [
+            result
+            for results in executor.map(put_values, [1000] * 8)
+            for result in results
+        ]
+
+    assert results.count(True) == 1
+    assert cloudwatch_resource.dropped_metrics == 8 * 1000 - 1
+
+
+def test_list_metrics_without_cache():
+
+    cloudwatch_resource = cloudwatch.CloudWatchResource(
+        Logger(service="test"), list_metrics_ttl=0, **AWS_KWARGS
+    )
+    request = {"Namespace": "namespace", "MetricName": "metric"}
+
+    with Stubber(cloudwatch_resource.resource.meta.client) as stubber:
+        stubber.add_response("list_metrics", {"Metrics": []}, request)
+        stubber.add_response(
+            "list_metrics",
+            {"Metrics": [{"Namespace": "namespace", "MetricName": "metric"}]},
+            request,
+        )
+
+        assert len(cloudwatch_resource.list_metrics("namespace", "metric")) == 0
+        assert len(cloudwatch_resource.list_metrics("namespace", "metric")) == 1
+
+        stubber.assert_no_pending_responses()
+
+
+def test_negative_list_metrics_ttl_is_rejected():
+
+    with pytest.raises(ValueError):
+        cloudwatch.CloudWatchResource(
+            Logger(service="test"), list_metrics_ttl=-1, **AWS_KWARGS
+        )
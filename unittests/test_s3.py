@@ -0,0 +1,136 @@
+from io import BytesIO
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from general_utils.aws_wrappers import s3
+
+AWS_KWARGS = {
+    "region_name": "us-east-1",
+    "aws_access_key_id": "testing",
+    "aws_secret_access_key": "testing",
+}
+
+
+def _streaming_body(data: bytes) -> StreamingBody:
+
+    return StreamingBody(BytesIO(data), len(data))
+
+
+@pytest.fixture
+def stubbed_s3_object(request):
+    """Yields an S3Object for the key of the test parametrization (rows.json by default),
+    the Stubber of its client and the list of bodies uploaded by the client.
+    """
+    s3_object = s3.S3Object(
+        "bucket", getattr(request, "param", "rows.json"), **AWS_KWARGS
+    )
+    client = s3_object.resource.meta.client
+    uploads = []
+
+    client.meta.events.register(
+        "before-parameter-build.s3.PutObject",
+        lambda params, **kwargs: uploads.append(params["Body"].read()),
+    )
+
+    with Stubber(client) as stubber:
+        yield s3_object, stubber, uploads
+
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.parametrize(
+    "existing",
+    [
+        b'[{"nan": NaN, "big": 1180591620717411303424}]',
+        b'[{"nan": NaN, "inf": -Infinity}]',
+        b'[{"big": 1180591620717411303424}]',
+    ],
+)
+def test_append_json_keeps_values_orjson_cannot_read(stubbed_s3_object, existing):
+
+    s3_object, stubber, uploads = stubbed_s3_object
+    stubber.add_response(
+        "get_object",
+        {"Body": _streaming_body(existing)},
+        {"Bucket": "bucket", "Key": "rows.json"},
+    )
+    stubber.add_response("put_object", {})
+
+    with s3.S3FileAppendContextManager(s3_object, propagate_errors=True) as file:
+        file.add_rows([{"new": 1}])
+
+    assert uploads == [existing[:-1] + b', {"new": 1}]']
+
+
+def test_append_json_propagates_read_errors(stubbed_s3_object):
+
+    s3_object, stubber, uploads = stubbed_s3_object
+    stubber.add_client_error("get_object", "AccessDenied", http_status_code=403)
+
+    with pytest.raises(ClientError):
+        s3.S3FileAppendData(s3_object)
+
+    assert uploads == []
+
+
+@pytest.mark.parametrize(
+    "stubbed_s3_object,existing",
+    [
+        ("rows.csv", "name,value\r\né,1\r\n".encode("utf-8")),
+        ("rows.csv", "name,value\r\né,1".encode("utf-8")),
+    ],
+    indirect=["stubbed_s3_object"],
+)
+def test_append_csv_keeps_existing_bytes(stubbed_s3_object, existing, monkeypatch):
+
+    s3_object, stubber, uploads = stubbed_s3_object
+    # "é" takes bytes 12 and 13, so the first chunk ends in the middle of it.
+    monkeypatch.setattr(s3, "READ_CHUNK_SIZE", 13)
+    stubber.add_response(
+        "get_object",
+        {"Body": _streaming_body(existing)},
+        {"Bucket": "bucket", "Key": "rows.csv"},
+    )
+    stubber.add_response("put_object", {})
+
+    with s3.S3FileAppendContextManager(s3_object, propagate_errors=True) as file:
+        file.add_headers(["name", "value"])
+        file.add_rows([["ñ", "2"]])
+
+    assert uploads == [
+        "name,value\r\né,1\r\nñ,2\r\n".encode("utf-8"),
+    ]
+
+
+@pytest.mark.parametrize("stubbed_s3_object", ["rows.csv"], indirect=True)
+def test_append_csv_creates_missing_file(stubbed_s3_object):
+
+    s3_object, stubber, uploads = stubbed_s3_object
+    stubber.add_client_error("get_object", "NoSuchKey", http_status_code=404)
+    stubber.add_response("put_object", {})
+
+    with s3.S3FileAppendContextManager(s3_object, propagate_errors=True) as file:
+        file.add_headers(["name", "value"])
+        file.add_rows([["ñ", "2"]])
+
+    assert uploads == ["name,value\r\nñ,2\r\n".encode("utf-8")]
+
+
+@pytest.mark.parametrize(
+    "stubbed_s3_object,existing",
+    [("rows.csv", b"name,value\r\n"), ("rows.json", b'[{"name": "value"}]')],
+    indirect=["stubbed_s3_object"],
+)
+def test_append_without_new_rows_does_not_upload(stubbed_s3_object, existing):
+
+    s3_object, stubber, uploads = stubbed_s3_object
+    stubber.add_response("get_object", {"Body": _streaming_body(existing)})
+
+    with s3.S3FileAppendContextManager(s3_object, propagate_errors=True) as file:
+        file.add_headers(["name", "value"])
+        file.add_rows([])
+
+    assert uploads == []
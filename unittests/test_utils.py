@@ -1,8 +1,8 @@
+import os
 from datetime import datetime
 
-from requests import post, get, put
-
 import pytest
+from requests import Response
 from unittest import TestCase
 
 from src.general_utils import utils
@@ -99,6 +99,46 @@ def test_directory_create_exists_delete():
         dirs_to_create.pop()
 
 
+def test_directory_create_delete_idempotent(tmp_path):
+
+    new_path = str(tmp_path / "TEST_DIR1")
+
+    utils.create_directories(new_path)
+    utils.create_directories(new_path)
+
+    with pytest.raises(FileExistsError):
+        utils.create_directories(new_path, exist_ok=False)
+
+    utils.delete_path(new_path)
+    utils.delete_path(new_path, missing_ok=True)
+
+    with pytest.raises(FileNotFoundError):
+        utils.delete_path(new_path)
+
+
+def test_file_checks_see_changes_immediately(tmp_path):
+
+    file_path = str(tmp_path / "test_file.txt")
+
+    assert not utils.file_exists(file_path)
+
+    with open(file_path, "w") as file:
+        file.write("abc")
+
+    assert utils.file_exists(file_path)
+    assert not utils.directory_exists(file_path)
+    assert utils.get_file_size(file_path) == 3
+
+    with open(file_path, "a") as file:
+        file.write("defgh")
+
+    assert utils.get_file_size(file_path) == 8
+
+    os.remove(file_path)
+
+    assert not utils.file_exists(file_path)
+
+
 @pytest.mark.parametrize(
     "inputs,output",
     [
@@ -178,6 +218,14 @@ def test_current_timestamp_isoformat_strings(inputs, output):
     assert utils.current_timestamp(**inputs).partition(":")[0] == output
 
 
+def test_current_timestamp_cached():
+
+    timestamp = utils.current_timestamp(cached=True)
+
+    assert utils.current_timestamp(cached=True) is timestamp
+    assert utils.current_timestamp(use_utc=True, cached=True) is not timestamp
+
+
 @pytest.mark.parametrize(
     "inputs,output",
     [
@@ -194,6 +242,13 @@ def test_round_number(inputs, output):
     assert utils.round_number(**inputs) == output
 
 
+@pytest.mark.parametrize("decimals,error", [(-1, ValueError), (1.5, TypeError)])
+def test_round_number_raise_error(decimals, error):
+
+    with pytest.raises(error):
+        utils.round_number(2.659, decimals=decimals)
+
+
 def test_dict_set():
 
     case = TestCase()
@@ -254,24 +309,32 @@ def test_filter_dict_or_dicts_in_list_LIST_DICT():
     assert utils.filter_dict_or_dicts_in_list(input, filter_keys) == output
 
 
+def test_response_to_json():
+
+    response = Response()
+    response._content = b'{"key_1": 1, "key_2": [1, 2]}'
+
+    assert utils.response_to_json(response) == {"key_1": 1, "key_2": [1, 2]}
+
+
 @pytest.mark.parametrize(
     "inputs",
     (
         {
             "url": "https://httpbin.org/put",
-            "request_function": put,
+            "method": "PUT",
             "max_attempts": 5,
             "timeout": 10,
         },
         {
             "url": "https://httpbin.org/get",
-            "request_function": get,
+            "method": "GET",
             "max_attempts": 5,
             "timeout": 10,
         },
         {
             "url": "https://httpbin.org/post",
-            "request_function": post,
+            "method": "POST",
             "max_attempts": 5,
             "timeout": 10,
         },
@@ -305,3 +368,23 @@ def test_http_request_failed_call(inputs, function):
 
     with pytest.raises(Exception):
         function(**inputs)
+
+
+def test_nested_dict_to_flat():
+
+    input = {
+        "key_1": 1,
+        "key_2": {"key_3": 3, "key_4": {"key_5": 5}},
+        "key_6": [{"key_7": 7}, {"key_7": 8}],
+        "key_9": 9,
+    }
+
+    mapping_dict = {
+        "key_1": "KEY_1",
+        "key_2": {"key_3": "KEY_3", "key_4": {"key_5": "KEY_5"}},
+        "key_6": {"key_7": "KEY_7"},
+    }
+
+    output = [("KEY_1", 1), ("KEY_3", 3), ("KEY_5", 5), ("KEY_7", 7), ("KEY_7", 8)]
+
+    assert list(utils.nested_dict_to_flat(input, mapping_dict)) == output